@@ -0,0 +1,106 @@
+"""Benchmark combining many judges' ballots into one consensus ranking.
+
+Run with ``python benchmarks/consensus.py`` from the repository root. Every
+judge answers about ``n log2 n`` random pairs of items, as binary insertion
+would, from a noisy copy of a hidden order, and their ballots are saved to a
+temporary directory like the app does. The time to load the ballots, build the
+sparse win matrix and solve it is reported for each method of
+:mod:`ordo.consensus`, along with the Kendall tau of the consensus against the
+hidden order.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+from scipy.stats import kendalltau
+
+from ordo import consensus
+
+
+def save_ballots(directory: str, n: int, judges: int, noise: float, seed: int):
+    rng = np.random.default_rng(seed)
+    rank = rng.permutation(n)
+    keys = [f"{i:032x}" for i in range(n)]
+    m = int(n * np.log2(n))
+    for judge in range(judges):
+        seen = rank + rng.normal(0, noise * n, n)
+        a = rng.integers(0, n, m)
+        b = rng.integers(0, n, m)
+        better = seen[a] < seen[b]
+        consensus.save_ballot(
+            "bench",
+            f"judge{judge}",
+            keys,
+            zip(np.where(better, a, b).tolist(), np.where(better, b, a).tolist()),
+            directory,
+        )
+    return keys, rank
+
+
+def bench_consensus(n: int, judges: int, noise: float, seed: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        keys, rank = save_ballots(directory, n, judges, noise, seed)
+        index = {key: i for i, key in enumerate(keys)}
+        for method in consensus.METHODS:
+            tic = time.perf_counter()
+            ballots = consensus.load_ballots("bench", directory)
+            loaded = time.perf_counter()
+            wins = consensus.win_matrix(ballots, index, n)
+            built = time.perf_counter()
+            ranking = consensus.consensus_ranking(wins, method)
+            solved = time.perf_counter()
+            tau = kendalltau(rank[ranking], np.arange(n)).statistic
+            results.append(
+                {
+                    "n": n,
+                    "judges": judges,
+                    "method": method,
+                    "pairs": int(wins.nnz),
+                    "load_seconds": loaded - tic,
+                    "matrix_seconds": built - loaded,
+                    "solve_seconds": solved - built,
+                    "total_seconds": solved - tic,
+                    "kendall_tau": float(tau),
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, nargs="+", default=[100, 1000, 2000])
+    parser.add_argument("--judges", type=int, nargs="+", default=[10, 300])
+    parser.add_argument(
+        "--noise",
+        type=float,
+        default=0.02,
+        help="spread of each judge's view of the order, as a share of n",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the results as JSON here")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.n:
+        for judges in args.judges:
+            for result in bench_consensus(n, judges, args.noise, args.seed):
+                results.append(result)
+                print(
+                    f"n={n:<5} judges={judges:<4} {result['method']:<14} "
+                    f"{result['pairs']:>8} pairs  "
+                    f"load {result['load_seconds'] * 1e3:6.1f} ms  "
+                    f"matrix {result['matrix_seconds'] * 1e3:6.1f} ms  "
+                    f"solve {result['solve_seconds'] * 1e3:6.1f} ms  "
+                    f"tau {result['kendall_tau']:.3f}"
+                )
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure how many bytes of image sources one rerun of the app sends.
+
+Run with ``python benchmarks/payload.py`` from the repository root. The numbers
+cover the sources of every <img> rendered on a step-2 rerun (the pair being
+compared) and a step-3 rerun (ranking chain, anchor images and summary table),
+for the three ways the app has embedded images:
+
+- ``inline-original``: the full upload as a base64 data URI
+- ``inline-thumbnail``: a cached display-sized thumbnail as a data URI
+- ``url``: a thumbnail written to the static media store, referenced by URL
+"""
+
+import argparse
+import io
+import json
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from ordo.images import ThumbnailCache
+from ordo.media import MediaStore
+from ordo.util import get_b64path
+
+
+def synthetic_photo(seed: int, width: int = 3024, height: int = 4032) -> bytes:
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack(
+        [(x * 255 // width), (y * 255 // height), np.full_like(x, seed * 37 % 255)],
+        axis=-1,
+    )
+    noise = rng.integers(-24, 24, size=base.shape)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def measure(uploads, get_src) -> dict:
+    srcs = [get_src(data) for data in uploads]
+    sizes = np.array([len(src.encode()) for src in srcs])
+    n = len(srcs)
+    return {
+        "step2_rerun_bytes": int(sizes[:2].sum()),
+        "step3_rerun_bytes": int(2 * sizes.sum() + sizes[[0, n // 2, n - 1]].sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=12, help="number of uploads")
+    parser.add_argument("-o", "--output", help="write the results as JSON here")
+    args = parser.parse_args()
+
+    uploads = [synthetic_photo(seed) for seed in range(args.n)]
+    cache = ThumbnailCache()
+    with tempfile.TemporaryDirectory() as root:
+        store = MediaStore(root, "/app/static")
+        results = {
+            "n": args.n,
+            "mean_upload_bytes": int(np.mean([len(data) for data in uploads])),
+            "inline-original": measure(uploads, get_b64path),
+            "inline-thumbnail": measure(uploads, cache.b64path),
+            "url": measure(uploads, lambda data: store.url(cache.get(data))),
+        }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
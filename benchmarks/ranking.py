@@ -0,0 +1,200 @@
+"""Benchmark the ranking loop and the app rerun time against the number of items.
+
+Run with ``python benchmarks/ranking.py`` from the repository root. For every
+item count and oracle the comparison loop of :class:`ordo.engine.RankingSession`
+is driven to completion, reporting the number of comparisons, per-click latency
+and the peak memory allocated while ranking. The app itself is timed through
+``AppTest`` with synthetic uploads for the smaller item counts. Results are
+printed and, with ``-o``, written as JSON so runs on different commits can be
+compared.
+
+Oracles answer from a hidden random order:
+
+- ``consistent`` always tells the truth
+- ``noisy`` picks the wrong item with probability ``--noise``
+- ``adversarial`` ignores the hidden order and picks whichever answer adds the
+  fewest implied pairs, which maximizes the number of questions left
+"""
+
+import argparse
+import io
+import itertools
+import json
+import pathlib
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+from scipy.stats import kendalltau
+
+from ordo.engine import RankingSession
+
+APP_PATH = pathlib.Path(__file__).parents[1] / "src" / "ordo" / "app.py"
+
+
+def consistent_oracle(rank, rng, noise):
+    def answer(session, i, j):
+        return (i, j) if rank[i] < rank[j] else (j, i)
+
+    return answer
+
+
+def noisy_oracle(rank, rng, noise):
+    def answer(session, i, j):
+        truth = (i, j) if rank[i] < rank[j] else (j, i)
+        return truth[::-1] if rng.random() < noise else truth
+
+    return answer
+
+
+def adversarial_oracle(rank, rng, noise):
+    def answer(session, i, j):
+        dominates = session.graph.dominates
+
+        def implied(winner, loser):
+            above = dominates[:, winner].sum() + 1
+            below = dominates[loser].sum() + 1
+            return above * below
+
+        return (i, j) if implied(i, j) <= implied(j, i) else (j, i)
+
+    return answer
+
+
+ORACLES = {
+    "consistent": consistent_oracle,
+    "noisy": noisy_oracle,
+    "adversarial": adversarial_oracle,
+}
+
+
+def bench_loop(n: int, oracle: str, noise: float, seed: int, scheduler: str) -> dict:
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(n)
+    rank = np.empty(n, dtype=int)
+    rank[order] = np.arange(n)
+    answer = ORACLES[oracle](rank, rng, noise)
+
+    tracemalloc.start()
+    session = RankingSession(n, scheduler=scheduler)
+    latencies = []
+    start = time.perf_counter()
+    pair = session.next_pair()
+    while pair is not None:
+        winner, loser = answer(session, *pair)
+        tic = time.perf_counter()
+        session.record(winner, loser)
+        pair = session.next_pair()
+        latencies.append(time.perf_counter() - tic)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1e3
+    ranked = session.ranking()
+    tau = kendalltau(rank[ranked], np.arange(len(ranked))).statistic
+    return {
+        "n": n,
+        "scheduler": scheduler,
+        "oracle": oracle,
+        "comparisons": len(latencies),
+        "comparisons_per_item": len(latencies) / n,
+        "total_seconds": total,
+        "click_ms_mean": float(latencies.mean()),
+        "click_ms_p50": float(np.percentile(latencies, 50)),
+        "click_ms_p95": float(np.percentile(latencies, 95)),
+        "click_ms_max": float(latencies.max()),
+        "peak_state_bytes": peak,
+        "kendall_tau": float(tau),
+    }
+
+
+def synthetic_upload(i: int) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (320, 240), (i * 53 % 256, i * 97 % 256, i * 31 % 256)).save(
+        buf, format="PNG"
+    )
+    return buf.getvalue()
+
+
+def bench_app(n: int, reruns: int) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP_PATH), default_timeout=600)
+    app.run()
+    for i in range(n):
+        app.file_uploader[0].upload(
+            f"item{i}.{10 * (i + 1)}.png", synthetic_upload(i), "image/png"
+        )
+    tic = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - tic
+    times = []
+    for _ in range(reruns):
+        tic = time.perf_counter()
+        app.run()
+        times.append(time.perf_counter() - tic)
+    assert not app.exception, app.exception
+    return {
+        "n": n,
+        "upload_rerun_seconds": first,
+        "rerun_seconds_mean": float(np.mean(times)),
+        "rerun_seconds_min": float(np.min(times)),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--oracles", nargs="+", default=list(ORACLES))
+    parser.add_argument("--schedulers", nargs="+", default=["binary-insertion"])
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--app-max-n",
+        type=int,
+        default=100,
+        help="only time AppTest reruns up to this many uploads (0 to skip)",
+    )
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write the results as JSON here")
+    args = parser.parse_args()
+
+    results = {"commit": git_commit(), "loop": [], "app": []}
+    for n in args.n:
+        for scheduler, oracle in itertools.product(args.schedulers, args.oracles):
+            result = bench_loop(n, oracle, args.noise, args.seed, scheduler)
+            results["loop"].append(result)
+            print(
+                f"n={n:<5} {scheduler:<16} {oracle:<12} "
+                f"{result['comparisons']:>7} comparisons  "
+                f"{result['click_ms_mean']:.3f} ms/click (p95 "
+                f"{result['click_ms_p95']:.3f})  "
+                f"peak {result['peak_state_bytes'] / 2**20:.1f} MiB  "
+                f"tau {result['kendall_tau']:.3f}"
+            )
+        if n <= args.app_max_n:
+            result = bench_app(n, args.reruns)
+            results["app"].append(result)
+            print(
+                f"n={n:<5} app rerun {result['rerun_seconds_mean'] * 1e3:.1f} ms "
+                f"(first after upload {result['upload_rerun_seconds'] * 1e3:.1f} ms)"
+            )
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark how long the app takes to start from a cold interpreter.
+
+Run with ``python benchmarks/startup.py`` from the repository root. Every
+repetition starts a fresh Python process, so nothing is cached in
+``sys.modules``, and times:
+
+- ``interpreter``: starting Python and exiting, the floor of everything below
+- ``import``: importing streamlit and the ``ordo`` modules the app loads
+- ``apptest``: creating an ``AppTest`` for the app, as ``tests/test_app.py`` does
+- ``first_render``: the first ``AppTest.run()``, i.e. what a new session waits for
+
+Heavy dependencies still loaded after the first render are listed, since pandas,
+SciPy and matplotlib should only be imported once a user reaches step 3. With
+``--max-seconds`` the script exits with an error when import, ``AppTest``
+startup and first render together take longer, which catches startup
+regressions.
+"""
+
+import argparse
+import json
+import pathlib
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+APP_PATH = pathlib.Path(__file__).parents[1] / "src" / "ordo" / "app.py"
+HEAVY_MODULES = ("pandas", "scipy", "matplotlib", "pyarrow")
+
+PROBE = f"""
+import json, sys, time
+tic = time.perf_counter()
+import streamlit
+from ordo import dedup, engine, images, media, pipeline, pricing, profiling, store
+imported = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({str(APP_PATH)!r}, default_timeout=600)
+created = time.perf_counter()
+app.run()
+rendered = time.perf_counter()
+assert not app.exception, app.exception
+print(json.dumps({{
+    "import": imported - tic,
+    "apptest": created - imported,
+    "first_render": rendered - created,
+    "heavy_modules": sorted(set({HEAVY_MODULES!r}) & set(sys.modules)),
+}}))
+"""
+
+
+def run(code: str) -> float:
+    tic = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+    return time.perf_counter() - tic
+
+
+def bench_startup(repeat: int) -> dict:
+    interpreter = [run("pass") for _ in range(repeat)]
+    probes = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE], check=True, capture_output=True, text=True
+        )
+        probes.append(json.loads(result.stdout.splitlines()[-1]))
+    results = {"interpreter_seconds": float(np.median(interpreter))}
+    for phase in ("import", "apptest", "first_render"):
+        results[f"{phase}_seconds"] = float(np.median([p[phase] for p in probes]))
+    results["heavy_modules"] = probes[-1]["heavy_modules"]
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        help="fail if import, AppTest startup and first render take longer",
+    )
+    parser.add_argument("-o", "--output", help="write the results as JSON here")
+    args = parser.parse_args()
+
+    results = {"commit": git_commit(), **bench_startup(args.repeat)}
+    for phase in ("interpreter", "import", "apptest", "first_render"):
+        print(f"{phase:<13} {results[f'{phase}_seconds'] * 1e3:8.1f} ms")
+    print(f"heavy modules after the first render: {results['heavy_modules'] or 'none'}")
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+    total = sum(results[f"{p}_seconds"] for p in ("import", "apptest", "first_render"))
+    if args.max_seconds is not None and total > args.max_seconds:
+        sys.exit(f"cold start took {total:.2f} s, over the {args.max_seconds} s budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
 import importlib.metadata
 
-__version__ = importlib.metadata.version("ordo")
+try:
+    __version__ = importlib.metadata.version("ordo")
+except importlib.metadata.PackageNotFoundError:
+    # running from a checkout that was never installed
+    __version__ = "unknown"
@@ -1,7 +1,9 @@
-if __name__ == "__main__":
-    import pathlib
-    import sys
+import argparse
+import pathlib
+import sys
+
 
+def run_app(args: argparse.Namespace) -> int:
     from streamlit.web import cli as stcli
 
     sys.argv = [
@@ -10,7 +12,69 @@ if __name__ == "__main__":
         str(pathlib.Path(__file__).parent.resolve() / "app.py"),
         "--server.runOnSave",
         "true",
+        "--server.enableStaticServing",
+        "true",
         "--theme.base",
         "light",
     ]
-    sys.exit(stcli.main())
+    return stcli.main()
+
+
+def run_rank(args: argparse.Namespace) -> int:
+    from ordo import batch
+
+    items = batch.scan_items(args.directory)
+    if len(items) < 2:
+        print(f"{args.directory}: need at least two priced images", file=sys.stderr)
+        return 1
+    try:
+        winners, losers = batch.read_comparisons(args.log, batch.item_index(items))
+        ranking = batch.rank_items(len(items), winners, losers, args.method)
+        summary = batch.summarize(items, ranking, args.model, args.anchors)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    batch.write_summary(summary, args.output)
+    print(
+        f"ranked {len(items)} items from {len(winners)} comparisons into {args.output}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main(argv=None) -> int:
+    from ordo.batch import METHODS
+    from ordo.pricing import PRICE_MODELS
+
+    parser = argparse.ArgumentParser(prog="python -m ordo")
+    parser.set_defaults(run=run_app)
+    commands = parser.add_subparsers(title="commands")
+    commands.add_parser("app", help="launch the web app (the default)")
+    rank = commands.add_parser(
+        "rank",
+        help="rank a directory of images from a comparison log",
+        description="Rank the title.price.suffix files of a directory from a CSV "
+        "or JSONL log with winner and loser columns, and write the priced "
+        "summary table to CSV or Parquet.",
+    )
+    rank.set_defaults(run=run_rank)
+    rank.add_argument("directory", type=pathlib.Path)
+    rank.add_argument("log", type=pathlib.Path, help="comparisons (.csv or .jsonl)")
+    rank.add_argument(
+        "-o", "--output", type=pathlib.Path, default="summary.csv", help="%(default)s"
+    )
+    rank.add_argument("--method", choices=METHODS, default="graph")
+    rank.add_argument("--model", choices=list(PRICE_MODELS), default="linear")
+    rank.add_argument(
+        "--anchors",
+        type=float,
+        nargs="+",
+        help="what the items at the anchor ranks are worth to you "
+        "(default: their listed prices)",
+    )
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,237 @@
-from copy import deepcopy
-from itertools import combinations
+import contextlib
+import io
+import pathlib
+import sys
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
-import pandas as pd
 import streamlit as st
 from st_click_detector import click_detector
-from util import INF, fit_exponential_prices, fit_linear_prices, get_b64path
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# `streamlit run src/ordo/app.py` from a checkout only puts src/ordo on sys.path
+SOURCE_DIRECTORY = str(pathlib.Path(__file__).resolve().parents[1])
+if SOURCE_DIRECTORY not in sys.path:
+    sys.path.insert(0, SOURCE_DIRECTORY)
+
+from ordo.consensus import (
+    ballot_path,
+    ballots_stamp,
+    consensus_ranking,
+    load_ballots,
+    save_ballot,
+    win_matrix,
+)
+from ordo.dedup import near_duplicates
+from ordo.engine import RankingSession
+from ordo.images import Thumbnail, ThumbnailCache
+from ordo.media import MediaStore
+from ordo.pipeline import UploadPipeline
+from ordo.pricing import PRICE_MODELS, anchor_positions, fit_prices
+from ordo.profiling import ENABLED as PROFILING_ENABLED
+from ordo.profiling import Profiler, start_rerun
+from ordo.store import ImageStore, SessionImages
+from ordo.util import INF
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 st.set_page_config(layout="centered", page_title="Ordo", page_icon="⚖️")
 
+PAGE_SIZE = 25
+
+
+@st.cache_resource
+def get_thumbnail_cache() -> ThumbnailCache:
+    return ThumbnailCache()
+
+
+@st.cache_resource
+def get_media_store() -> Optional[MediaStore]:
+    """Store of the thumbnails served by URL, or None to inline them instead."""
+    base_url = (st.get_option("server.baseUrlPath") or "").strip("/")
+    try:
+        return MediaStore(
+            url_prefix="/" + "/".join(filter(None, [base_url, "app", "static"]))
+        )
+    except OSError as e:
+        print(f"inlining thumbnails, cannot serve them by URL: {e}", file=sys.stderr)
+        return None
+
+
+@st.cache_resource
+def get_image_store() -> ImageStore:
+    return ImageStore()
+
+
+def get_thumbnail(key: str) -> Thumbnail:
+    return thumbnails.get(get_image_store().get(key), key)
+
+
+def get_src(key: str) -> str:
+    thumbnail = get_thumbnail(key)
+    media = get_media_store() if st.get_option("server.enableStaticServing") else None
+    if media is not None:
+        with contextlib.suppress(OSError):
+            return media.url(thumbnail)
+    return thumbnail.b64path
+
+
+@st.cache_resource
+def get_pipeline() -> UploadPipeline:
+    return UploadPipeline(get_image_store(), get_thumbnail_cache())
+
+
+@st.fragment(run_every=0.5)
+def upload_progress(keys: List[str]):
+    """Progress of images still processing; reruns the app as soon as one is done."""
+    done = sum(get_pipeline().submit(key).done() for key in keys)
+    if done:
+        st.rerun()
+    st.progress(done / len(keys), text=f"Processing {len(keys)} more images...")
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def get_summary(ranking, titles, prices, values) -> "pd.DataFrame":
+    """Step-3 summary, rebuilt only when the ranking or the fitted values change."""
+    # pandas (and matplotlib, for the gradient) only load once step 3 is reached
+    import pandas as pd
+
+    df = pd.DataFrame(
+        {"item": ranking, "name": titles, "price": prices, "value": values}
+    )
+    df["price - value"] = df["price"] - df["value"]
+    df.index.name = "preference"
+    return df.reset_index()
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def export_summary(df: "pd.DataFrame", file_format: str) -> bytes:
+    if file_format == "parquet":
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+        return buf.getvalue()
+    return df.to_csv(index=False).encode()
+
+
+@st.fragment
+def summary_table(df: "pd.DataFrame", srcs: List[str]):
+    """Paged step-3 table; filtering, paging and exporting only rerun this."""
+    table = st.container()
+    diff = df["price - value"].to_numpy()
+    col_limit, col_page = st.columns([3, 1])
+    with col_limit:
+        limit = st.number_input(
+            "If you want, you can **ignore** all items with price - value **above** certain value:",
+            step=1,
+            value=None,
+            key="limit-input",
+        )
+    shown = df[diff <= (INF if limit is None else limit)]
+    n_pages = max(1, -(-len(shown) // PAGE_SIZE))
+    with col_page:
+        page = st.number_input(
+            f"Page (of {n_pages})", min_value=1, max_value=n_pages, key="summary-page"
+        )
+    rows = shown.iloc[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]
+    rows = rows.assign(preview=[srcs[i] for i in rows["item"]]).drop(columns="item")
+    vm = abs(diff).max()
+    table.dataframe(
+        rows.style.format(precision=0).background_gradient(
+            cmap="RdYlGn_r",
+            subset="price - value",
+            low=0.1,
+            high=0.1,
+            vmin=-vm,
+            vmax=vm,
+        ),
+        column_config={
+            "preference": st.column_config.Column(
+                label="❤️ Preference",
+                help="Smaller means better!",
+                width="small",
+            ),
+            "name": st.column_config.Column(label="🏷️ Name", width="small"),
+            "price": st.column_config.Column(label="💰 Listed Price", width="small"),
+            "value": st.column_config.Column(label="✒️ Your Estimate", width="small"),
+            "preview": st.column_config.ImageColumn(
+                label="🖼️ Preview",
+                help="Double click or press `SPACE` to preview larger image",
+                width="small",
+            ),
+            "price - value": st.column_config.Column(
+                label="🔥 Price - Estimate",
+                help="Lower means better!",
+                width="small",
+            ),
+        },
+        use_container_width=True,
+        hide_index=True,
+    )
+    shown = shown.drop(columns="item")
+    for col, (file_format, mime) in zip(
+        st.columns(4),
+        [("csv", "text/csv"), ("parquet", "application/vnd.apache.parquet")],
+    ):
+        col.download_button(
+            f"Download {file_format.upper()}",
+            export_summary(shown, file_format),
+            file_name=f"ordo-summary.{file_format}",
+            mime=mime,
+        )
+
+
+def kept_text_input(label: str, key: str, **kwargs) -> str:
+    """Text input whose value survives the reruns that do not show it.
+
+    Streamlit forgets the state of a widget as soon as a rerun skips it, so the
+    value is also kept under ``<key>_value`` and put back before rendering.
+    """
+    st.session_state[key] = st.session_state.get(f"{key}_value", "")
+
+    def keep():
+        st.session_state[f"{key}_value"] = st.session_state[key]
+
+    return st.text_input(label, key=key, on_change=keep, **kwargs)
+
+
+@st.cache_data(max_entries=16, show_spinner="Combining the team's comparisons...")
+def get_consensus(keys: Tuple[str, ...], team: str, stamp: Tuple) -> List[int]:
+    """Consensus ranking of ``keys`` over the team's ballots, which ``stamp`` keys."""
+    wins = win_matrix(
+        load_ballots(team), {key: i for i, key in enumerate(keys)}, len(keys)
+    )
+    return consensus_ranking(wins)
+
+
+@st.cache_resource
+def get_profiler() -> Optional[Profiler]:
+    return Profiler() if PROFILING_ENABLED else None
+
+
+thumbnails = get_thumbnail_cache()
+profiler = get_profiler()
+profile = start_rerun(profiler, st.session_state)
+
+RANKING_MODES = {
+    "binary-insertion": "I know what I like (fewest clicks)",
+    "pairwise": "Let me go pair by pair",
+    "bradley-terry": "I might contradict myself",
+    "top-k": "I only need my favorites",
+}
+
 st.title("⚖️ Ordo")
 
+if profiler is not None:
+    with st.sidebar:
+        st.markdown("**Previous reruns of this session**")
+        for record in [
+            r
+            for r in profiler.recent
+            if r["session"] == st.session_state["_profile_session"]
+        ][-2:]:
+            st.caption(f"{record['scope']}: {record['seconds'] * 1e3:.1f} ms")
+            st.dataframe(record["phases"], hide_index=True)
+
 (tab_intro, tab_usage) = st.tabs(
     [
         "What is Ordo?",
@@ -41,7 +263,7 @@ with tab_intro:
     st.markdown(tab0_align_html, unsafe_allow_html=True)
 
 
-def get_content(b64paths, idx_left, idx_right):
+def get_content(srcs, idx_left, idx_right, prefetch=()):
     return """
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
     <style>
@@ -81,15 +303,72 @@ def get_content(b64paths, idx_left, idx_right):
             <span class="skip-hover">skip for now?</span>
         </a>
     </div>
+    <div style="position:absolute;width:0;height:0;overflow:hidden">{}</div>
     """.format(
         idx_left,
-        b64paths[idx_left],
+        srcs[idx_left],
         idx_right,
-        b64paths[idx_right],
+        srcs[idx_right],
+        "".join(f'<img src="{src}" alt="">' for src in prefetch),
     )
 
 
-pairs = None
+def in_fragment_run() -> bool:
+    """Whether this run only reruns fragments, rather than the whole script."""
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+@st.fragment
+def compare(session, srcs):
+    """Step-2 comparison widget; a click only reruns this fragment."""
+    fragment_run = in_fragment_run()
+    # a full run profiles these phases as part of the app rerun
+    rerun = (
+        start_rerun(profiler, st.session_state, "fragment") if fragment_run else profile
+    )
+    with rerun.phase("pair generation"):
+        st.session_state["curr_pair"] = session.next_pair()
+    st.markdown("Click on the image that you prefer:")
+    prefetch = []
+    if st.get_option("server.enableStaticServing"):
+        # warm the browser cache with the images of the likely next pairs;
+        # inlined images would only make this rerun heavier
+        with rerun.phase("lookahead"):
+            prefetch = [srcs[i] for i in session.lookahead()]
+    with rerun.phase("html rendering"):
+        clicked = click_detector(
+            get_content(srcs, *st.session_state["curr_pair"], prefetch)
+        )
+    st.markdown(
+        f"Remaining comparisons (at most) after this: {session.remaining() - 1}"
+    )
+    if fragment_run:
+        rerun.finish()
+
+    if clicked != "":
+        if clicked == "skip":
+            with rerun.phase("closure update"):
+                session.skip(st.session_state["curr_pair"])
+            if session.next_pair() == st.session_state["curr_pair"]:
+                return
+        else:
+            idx_better = int(clicked)
+            idx_worse = (
+                st.session_state["curr_pair"][0]
+                ^ st.session_state["curr_pair"][1]
+                ^ idx_better
+            )
+            with rerun.phase("closure update"):
+                session.record(idx_better, idx_worse)
+        with rerun.phase("pair generation"):
+            done = session.next_pair() is None
+        if done:
+            # the ranking is complete: rerun the whole page to show step 3
+            st.rerun()
+        st.rerun(scope="fragment")
+
+
 with tab_usage:
     if "step1_expanded" not in st.session_state:
         st.session_state["step1_expanded"] = True
@@ -124,127 +403,201 @@ with tab_usage:
             st.markdown(uploader_desc1)
         with col2:
             st.markdown(uploader_desc2)
-        files = (
-            st.file_uploader(
-                label="upload", accept_multiple_files=True, label_visibility="collapsed"
-            )
-            or []
+        if "uploads" not in st.session_state:
+            st.session_state["uploads"] = SessionImages(get_image_store())
+            st.session_state["uploader"] = 0
+        uploads = st.session_state["uploads"]
+        new_files = st.file_uploader(
+            label="upload",
+            accept_multiple_files=True,
+            label_visibility="collapsed",
+            key=f"uploader_{st.session_state['uploader']}",
         )
-        filenames = []
-        files_nodups = []
+        pipeline = get_pipeline()
+        if new_files:
+            with profile.phase("upload ingest"):
+                keys = pipeline.put([f.getvalue() for f in new_files])
+                for f, key in zip(new_files, keys):
+                    uploads.adopt(f.name, key)
+            # a fresh uploader lets Streamlit drop the uploaded bytes, so the
+            # session only keeps content hashes into the shared image store
+            st.session_state["uploader"] += 1
+            st.rerun()
+        if len(uploads):
+
+            def remove_uploads():
+                for name in st.session_state["remove"]:
+                    uploads.remove(name)
+                st.session_state["remove"] = []
+
+            st.multiselect(
+                "Remove uploads",
+                options=[name for name, _ in uploads],
+                key="remove",
+                on_change=remove_uploads,
+                placeholder=f"{len(uploads)} images uploaded, pick any to remove",
+                label_visibility="collapsed",
+            )
+        # content hash -> when it finished processing, so that items finishing
+        # later are appended to the ranking instead of shifting it
+        ready = st.session_state.setdefault("ready", {})
+        with profile.phase("upload processing"):
+            pipeline.wait([key for _, key in uploads if key not in ready], 0.25)
+        files = []
+        hashes = []
+        seen = set()
+        pending = []
+        exact_duplicates = []
+        unreadable = []
         if "price_map" not in st.session_state:
             st.session_state["price_map"] = {}
-        for f in files:
-            if f.name in st.session_state["price_map"]:
-                name, suffix = f.name.rsplit(".", 1)
-                f.name = ".".join(
-                    [name, str(st.session_state["price_map"][f.name]), suffix]
-                )
-            if f.name in filenames:
-                continue
-            if not f.name.rsplit(".", 2)[-2].isdigit():
-                p = st.number_input(
-                    label="Enter the listed price of the shown item:",
-                    value=None,
-                    min_value=0,
-                    key=f.name,
-                )
-                st.markdown(
-                    '<img src="{}" width=100%>'.format(get_b64path(f.getvalue())),
-                    unsafe_allow_html=True,
-                )
-                if p is not None:
-                    st.session_state["price_map"][f.name] = p
+        with profile.phase("upload dedup"):
+            for name, key in sorted(uploads, key=lambda u: ready.get(u[1], len(ready))):
+                if name in st.session_state["price_map"]:
+                    title, suffix = name.rsplit(".", 1)
+                    name = ".".join(
+                        [title, str(st.session_state["price_map"][name]), suffix]
+                    )
+                future = pipeline.submit(key)
+                if not future.done():
+                    pending.append(key)
+                    continue
+                ready.setdefault(key, len(ready))
+                if not future.result().valid:
+                    unreadable.append(name)
+                    continue
+                if key in seen:
+                    exact_duplicates.append(name)
+                    continue
+                files.append((name, key))
+                hashes.append(future.result().dhash)
+                seen.add(key)
+            hashed = [i for i, h in enumerate(hashes) if h is not None]
+            groups = [
+                [hashed[i] for i in group]
+                for group in near_duplicates([hashes[i] for i in hashed])
+            ]
+        if pending:
+            upload_progress(pending)
+        if unreadable:
+            st.warning("Could not read these uploads: " + ", ".join(unreadable))
+        if exact_duplicates:
+            st.info(
+                "Skipped exact copies of other uploads: " + ", ".join(exact_duplicates)
+            )
+        merged = set()
+        for group in groups:
+            with st.container(border=True):
+                st.markdown("These uploads look almost the same:")
+                for col, i in zip(st.columns(max(len(group), 3)), group):
+                    with col:
+                        st.markdown(
+                            '<img src="{}" width=100%>'.format(get_src(files[i][1])),
+                            unsafe_allow_html=True,
+                        )
+                        st.caption(files[i][0])
+                if st.checkbox(
+                    f"Rank them as one item ({files[group[0]][0]})",
+                    key="merge_" + "_".join(files[i][1] for i in group),
+                ):
+                    merged.update(group[1:])
+        if merged:
+            files = [f for i, f in enumerate(files) if i not in merged]
+        unpriced = [
+            (name, key) for name, key in files if not name.rsplit(".", 2)[-2].isdigit()
+        ]
+        if unpriced:
+            with st.form("prices"):
+                st.markdown("Enter the listed prices of the shown items:")
+                for i in range(0, len(unpriced), 3):
+                    for col, (name, key) in zip(st.columns(3), unpriced[i : i + 3]):
+                        with col:
+                            st.number_input(
+                                label=name,
+                                value=None,
+                                min_value=0,
+                                key=f"price_of_{name}",
+                                label_visibility="collapsed",
+                            )
+                            st.markdown(
+                                '<img src="{}" width=100%>'.format(get_src(key)),
+                                unsafe_allow_html=True,
+                            )
+                submitted = st.form_submit_button("Save prices")
+            if submitted:
+                entered = {
+                    name: st.session_state[f"price_of_{name}"] for name, _ in unpriced
+                }
+                if None in entered.values():
+                    st.warning("Please enter a price for every item.")
+                else:
+                    st.session_state["price_map"].update(entered)
                     st.rerun()
-                st.stop()
-            files_nodups.append(f)
-            filenames.append(f.name)
-        files = files_nodups
+            st.stop()
         if len(files) > 1:
             st.success("All images uploaded (you can still add/delete if you want).")
-            if st.session_state["step1_expanded"]:
+            if st.session_state["step1_expanded"] and not groups:
                 st.session_state["step1_expanded"] = False
                 st.rerun()
 
     if len(files) > 1:
-        if "known_pairs" not in st.session_state:
-            st.session_state["known_pairs"] = set()
-            st.session_state["skipped_pairs"] = set()
-            st.session_state["better_than"] = {}
+        keys = [key for _, key in files]
+        ranked = st.session_state.get("ranked_keys", [])
+        # items may only be appended to a ranking; any other change starts over
+        if "ranking" not in st.session_state or keys[: len(ranked)] != ranked:
+            mode = st.session_state.get("mode", "binary-insertion")
+            st.session_state["ranking"] = RankingSession(
+                len(files),
+                scheduler=mode,
+                **({"k": st.session_state.get("top_k", 3)} if mode == "top-k" else {}),
+            )
+        elif len(files) > st.session_state["ranking"].n:
+            st.session_state["ranking"].add_items(
+                len(files) - st.session_state["ranking"].n
+            )
+        session = st.session_state["ranking"]
+        st.session_state["ranked_keys"] = keys
 
-        b64paths = [get_b64path(f.getvalue()) for f in files]
+        with profile.phase("b64 encoding"):
+            srcs = [get_src(key) for _, key in files]
         titles = []
         prices = []
-        for f in files:
-            title, price, _ = f.name.split(".", 2)
+        for name, _ in files:
+            title, price, _ = name.split(".", 2)
             titles.append(title)
             prices.append(int(price))
-        pairs = list(combinations(range(len(files)), 2))
-        pairs = [
-            p
-            for p in pairs
-            if (p not in st.session_state["known_pairs"])
-            and (p[::-1] not in st.session_state["known_pairs"])
-        ]
-        skipped_pairs = [p for p in pairs if p in st.session_state["skipped_pairs"]]
-        not_skipped_pairs = [p for p in pairs if p not in skipped_pairs]
-        pairs = not_skipped_pairs + skipped_pairs
-        st.session_state["step2_expanded"] = bool(pairs)
+        with profile.phase("pair generation"):
+            st.session_state["curr_pair"] = session.next_pair()
+        st.session_state["step2_expanded"] = st.session_state["curr_pair"] is not None
         st.session_state["step3_expanded"] = False
 
         with st.expander(
             label="Step 2: choose between the two 🤯",
             expanded=st.session_state["step2_expanded"],
         ):
-            if pairs:
-                st.markdown("Click on the image that you prefer:")
-                st.session_state["curr_pair"] = pairs.pop(0)
-                clicked = click_detector(
-                    get_content(b64paths, *st.session_state["curr_pair"])
+            st.radio(
+                label="How do you want to rank?",
+                options=list(RANKING_MODES),
+                format_func=RANKING_MODES.get,
+                horizontal=True,
+                key="mode",
+                on_change=lambda: st.session_state.pop("ranking", None),
+                help="Switching between them starts the comparisons over.",
+            )
+            if st.session_state.get("mode") == "top-k":
+                st.number_input(
+                    "How many favorites do you need?",
+                    min_value=1,
+                    value=3,
+                    step=1,
+                    key="top_k",
+                    on_change=lambda: st.session_state.pop("ranking", None),
                 )
-                st.markdown(f"Remaining comparisons (at most) after this: {len(pairs)}")
-
-                if clicked != "":
-                    if clicked == "skip":
-                        if (
-                            st.session_state["curr_pair"]
-                            not in st.session_state["skipped_pairs"]
-                        ):
-                            st.session_state["skipped_pairs"].add(
-                                st.session_state["curr_pair"]
-                            )
-                            st.rerun()
-                    else:
-                        idx_better = int(clicked)
-                        idx_worse = (
-                            st.session_state["curr_pair"][0]
-                            ^ st.session_state["curr_pair"][1]
-                            ^ idx_better
-                        )
-                        better_than = deepcopy(st.session_state["better_than"])
-                        if idx_better not in better_than:
-                            better_than[idx_better] = set()
-                        idx_worse_extended = {idx_worse} | better_than.get(
-                            idx_worse, set()
-                        )
-                        better_than[idx_better] |= idx_worse_extended
-                        st.session_state["known_pairs"] |= {
-                            (idx_better, i) for i in idx_worse_extended
-                        }
-                        for k, v in better_than.items():
-                            if idx_better in v:
-                                better_than[k] |= idx_worse_extended
-                        st.session_state["better_than"] = better_than
-                        st.rerun()
+            if st.session_state["curr_pair"] is not None:
+                compare(session, srcs)
             else:
-                better_than = sorted(
-                    st.session_state["better_than"],
-                    key=lambda k: len(st.session_state["better_than"][k]),
-                    reverse=True,
-                )
-                idx_last = [i for i in range(len(files)) if i not in better_than]
-                better_than += idx_last
-                assert len(better_than) == len(files)
+                better_than = session.ranking()
+                assert len(better_than) <= len(files)
                 better_than_html = """
                 <style>
                     .image-chain {{
@@ -262,12 +615,19 @@ with tab_usage:
                 <div class="image-chain">{}</div>         
                 """.format(
                     len(better_than),
-                    "".join([f'<img src="{b64paths[i]}">' for i in better_than]),
-                )
-                st.markdown(better_than_html, unsafe_allow_html=True)
-                st.success(
-                    "All images ranked above, with the first being your favorite."
+                    "".join([f'<img src="{srcs[i]}">' for i in better_than]),
                 )
+                with profile.phase("html rendering"):
+                    st.markdown(better_than_html, unsafe_allow_html=True)
+                if len(better_than) < len(files):
+                    st.success(
+                        f"Your top {len(better_than)} above, with the first being your "
+                        "favorite. The other items are left out of the summary."
+                    )
+                else:
+                    st.success(
+                        "All images ranked above, with the first being your favorite."
+                    )
 
                 st.session_state["step3_expanded"] = True
 
@@ -276,182 +636,126 @@ with tab_usage:
                 label="Step 3: calibrate your price curve 📈",
                 expanded=st.session_state["step3_expanded"],
             ):
+                col_team, col_judge, col_share = st.columns(
+                    [2, 2, 1], vertical_alignment="bottom"
+                )
+                with col_team:
+                    team = kept_text_input(
+                        "Ranking with a team? Your team ID:",
+                        key="team",
+                        help="Only ballots shared under the same team ID are combined.",
+                    )
+                with col_judge:
+                    judge = kept_text_input("Your name:", key="judge")
+                replace = False
+                if team and judge and ballot_path(team, judge).exists():
+                    replace = st.checkbox(
+                        f"{judge} already shared a ballot with team {team}: "
+                        "replace it",
+                        key="replace_ballot",
+                    )
+                if col_share.button("Share", disabled=not (team and judge)):
+                    try:
+                        save_ballot(
+                            team,
+                            judge,
+                            [key for _, key in files],
+                            session.history,
+                            replace=replace,
+                        )
+                    except FileExistsError:
+                        st.warning(
+                            f"{judge} already shared a ballot with team {team}. "
+                            "Pick another name, or tick the box above to replace it."
+                        )
+                    else:
+                        st.success(
+                            f"Shared your {len(session.history)} answers with team "
+                            f"{team} as {judge}."
+                        )
+                stamp = ballots_stamp(team) if team else ()
+                if stamp:
+                    source = st.radio(
+                        label="Price the ranking of:",
+                        options=["mine", "team"],
+                        format_func={
+                            "mine": "Your own comparisons",
+                            "team": f"The consensus of {len(stamp)} judges",
+                        }.get,
+                        horizontal=True,
+                        key="ranking_source",
+                    )
+                    if source == "team":
+                        with profile.phase("consensus"):
+                            better_than = get_consensus(
+                                tuple(key for _, key in files), team, stamp
+                            )[: session.scheduler.n_ranked]
                 dist_type = st.radio(
                     label="Select a distribution:",
-                    options=["Linear", "Exponential"],
-                    captions=[
-                        '"Everything is similar to everything in this pool"',
-                        '"I think there is a long and expensive right tail"',
-                    ],
+                    options=list(PRICE_MODELS),
+                    format_func=lambda model: PRICE_MODELS[model].label,
+                    captions=[model.caption for model in PRICE_MODELS.values()],
                     horizontal=True,
                     label_visibility="collapsed",
+                    key="dist_type",
                 )
-                values = None
-                if dist_type == "Linear":
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        price1 = st.number_input(
-                            "What would you pay for the piece below?",
-                            step=1,
-                            value=None,
-                            min_value=0,
-                            key="price_left",
-                        )
-                        st.markdown(
-                            '<img src="{}" width=100%>'.format(
-                                b64paths[better_than[0]]
-                            ),
-                            unsafe_allow_html=True,
-                        )
-                    with col2:
-                        price2 = st.number_input(
-                            "What would you pay for the piece below?",
-                            step=1,
-                            value=None,
-                            min_value=0,
-                            key="price_right",
-                        )
-                        st.markdown(
-                            '<img src="{}" width=100%>'.format(
-                                b64paths[better_than[-1]]
-                            ),
-                            unsafe_allow_html=True,
-                        )
-                    if None not in (price1, price2):
-                        if not (price1 > price2):
-                            st.error(
-                                "The prices must be in descending order due to your preference in step 2."
-                                "Please re-enter your pricing."
+                model = PRICE_MODELS[dist_type]
+                n = len(better_than)
+                if n < model.n_anchors:
+                    st.error(
+                        f"Cannot fit {model.label.lower()} curve with only n={n} pieces. Please choose linear instead."
+                    )
+                    st.stop()
+                anchor_prices = []
+                for col, position in zip(
+                    st.columns(model.n_anchors),
+                    anchor_positions(n, model.n_anchors),
+                ):
+                    with col:
+                        anchor_prices.append(
+                            st.number_input(
+                                "What would you pay for the piece below?",
+                                step=1,
+                                value=None,
+                                min_value=0,
+                                key=f"price_{position}",
                             )
-                        else:
-                            values = fit_linear_prices(price1, price2, len(better_than))
-                elif dist_type == "Exponential":
-                    n = len(better_than)
-                    if n < 3:
-                        st.error(
-                            f"Cannot fit exponential curve with only n={n} pieces. Please choose linear instead."
-                        )
-                        st.stop()
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        price1 = st.number_input(
-                            "What would you pay for the piece below?",
-                            step=1,
-                            value=None,
-                            min_value=0,
-                            key="price_left",
                         )
                         st.markdown(
                             '<img src="{}" width=100%>'.format(
-                                b64paths[better_than[0]]
+                                srcs[better_than[position]]
                             ),
                             unsafe_allow_html=True,
                         )
-                    with col2:
-                        price2 = st.number_input(
-                            "What would you pay for the piece below?",
-                            step=1,
-                            value=None,
-                            min_value=0,
-                            key="price_mid",
-                        )
-                        st.markdown(
-                            '<img src="{}" width=100%>'.format(
-                                b64paths[better_than[n // 2]]
-                            ),
-                            unsafe_allow_html=True,
-                        )
-                    with col3:
-                        price3 = st.number_input(
-                            "What would you pay for the piece below?",
-                            step=1,
-                            value=None,
-                            min_value=0,
-                            key="price_right",
-                        )
-                        st.markdown(
-                            '<img src="{}" width=100%>'.format(
-                                b64paths[better_than[-1]]
-                            ),
-                            unsafe_allow_html=True,
+                values = None
+                if None not in anchor_prices:
+                    if not all(
+                        p1 > p2 for p1, p2 in zip(anchor_prices, anchor_prices[1:])
+                    ):
+                        st.error(
+                            "The prices must be in descending order due to your preference in step 2."
+                            "Please re-enter your pricing."
                         )
-                    if None not in (price1, price2, price3):
-                        if not (price1 > price2 > price3):
-                            st.error(
-                                "The prices must be in descending order due to your preference in step 2."
-                                "Please re-enter your pricing."
-                            )
-                        else:
-                            values = fit_exponential_prices(price1, price2, price3, n)
-
-                else:
-                    raise ValueError
+                    else:
+                        try:
+                            with profile.phase("curve fitting"):
+                                values = fit_prices(dist_type, anchor_prices, n)
+                        except ValueError as e:
+                            st.error(str(e))
 
                 if values is not None:
-                    assert len(titles) == len(better_than)
-                    df_summary = pd.DataFrame(
-                        {
-                            "price": [prices[i] for i in better_than],
-                            "value": values,
-                            "preview": [b64paths[i] for i in better_than],
-                        }
-                    )
-                    df_summary["price - value"] = df_summary.eval("price - value")
-                    df_summary.index.name = "preference"
-                    vm = df_summary["price - value"].abs().max()
+                    assert len(values) == len(better_than)
                     st.success(
                         "🎉Congratulations!"
                         "All steps are finished and your final summary table is now shown below:"
                     )
-                    if "limit" not in st.session_state:
-                        st.session_state["limit"] = None
-                    st.dataframe(
-                        df_summary[
-                            df_summary["price - value"]
-                            <= (st.session_state["limit"] or INF)
-                        ]
-                        .reset_index()
-                        .style.format(precision=0)
-                        .background_gradient(
-                            cmap="RdYlGn_r",
-                            subset="price - value",
-                            low=0.1,
-                            high=0.1,
-                            vmin=-vm,
-                            vmax=vm,
-                        ),
-                        column_config={
-                            "preference": st.column_config.Column(
-                                label="❤️ Preference",
-                                help="Smaller means better!",
-                                width="small",
-                            ),
-                            "price": st.column_config.Column(
-                                label="💰 Listed Price", width="small"
-                            ),
-                            "value": st.column_config.Column(
-                                label="✒️ Your Estimate", width="small"
-                            ),
-                            "preview": st.column_config.ImageColumn(
-                                label="🖼️ Preview",
-                                help="Double click or press `SPACE` to preview larger image",
-                                width="small",
-                            ),
-                            "price - value": st.column_config.Column(
-                                label="🔥 Price - Estimate",
-                                help="Lower means better!",
-                                width="small",
-                            ),
-                        },
-                        use_container_width=True,
-                        hide_index=True,
-                    )
-                    limit = st.number_input(
-                        "If you want, you can **ignore** all items with price - value **above** certain value:",
-                        step=1,
-                        value=None,
-                        key="limit-input",
-                    )
-                    if limit != st.session_state["limit"]:
-                        st.session_state["limit"] = limit
-                        st.rerun()
+                    with profile.phase("dataframe rendering"):
+                        df_summary = get_summary(
+                            tuple(better_than),
+                            tuple(titles[i] for i in better_than),
+                            tuple(prices[i] for i in better_than),
+                            tuple(values),
+                        )
+                    summary_table(df_summary, srcs)
+
+profile.finish()
@@ -0,0 +1,147 @@
+import csv
+import json
+import os
+import pathlib
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ordo.bradley_terry import fit_bradley_terry
+from ordo.graph import PreferenceGraph
+from ordo.pricing import PRICE_MODELS, anchor_positions, fit_prices
+
+METHODS = ("graph", "bradley-terry")
+
+
+class Item(NamedTuple):
+    name: str
+    title: str
+    price: int
+
+
+def scan_items(directory: os.PathLike) -> List[Item]:
+    """Files named ``title.price.suffix`` in ``directory``, sorted by name.
+
+    Anything else in the directory (sub-directories, files without an integer
+    price) is ignored.
+    """
+    items = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            parts = entry.name.split(".")
+            if len(parts) < 3 or not parts[-2].isdigit() or not entry.is_file():
+                continue
+            items.append(Item(entry.name, ".".join(parts[:-2]), int(parts[-2])))
+    items.sort()
+    return items
+
+
+def item_index(items: Sequence[Item]) -> Dict[str, int]:
+    """Look-up from file names, and titles that are unique, to item indices."""
+    index = {}
+    titles = {}
+    for i, item in enumerate(items):
+        index[item.name] = i
+        titles.setdefault(item.title, []).append(i)
+    for title, matches in titles.items():
+        if len(matches) == 1:
+            index.setdefault(title, matches[0])
+    return index
+
+
+def _read_rows(path: pathlib.Path) -> Iterator[Tuple[int, dict]]:
+    with open(path, newline="") as fp:
+        if path.suffix == ".jsonl":
+            for line_no, line in enumerate(fp, 1):
+                if line.strip():
+                    yield line_no, json.loads(line)
+        else:
+            yield from enumerate(csv.DictReader(fp), 2)
+
+
+def read_comparisons(
+    path: os.PathLike, index: Dict[str, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Winner and loser indices of every comparison in a CSV or JSONL log.
+
+    Each record needs a ``winner`` and a ``loser`` column (or key) holding file
+    names or titles of the scanned items. The log is streamed into compact
+    arrays, so it is never held in memory as rows.
+    """
+    path = pathlib.Path(path)
+    winners = array("l")
+    losers = array("l")
+    for line_no, row in _read_rows(path):
+        try:
+            winners.append(index[row["winner"]])
+            losers.append(index[row["loser"]])
+        except KeyError as e:
+            raise ValueError(f"{path}:{line_no}: unknown item or column {e}") from None
+    return np.frombuffer(winners, dtype="l"), np.frombuffer(losers, dtype="l")
+
+
+def rank_items(
+    n: int, winners: np.ndarray, losers: np.ndarray, method: str = "graph"
+) -> List[int]:
+    """Items ordered from the most to the least preferred.
+
+    ``graph`` takes the transitive closure of the log like the app does; a
+    comparison that contradicts earlier ones is ignored. ``bradley-terry`` fits
+    strengths to all of them instead, which suits noisy logs and needs no
+    ``n x n`` matrix.
+    """
+    if method == "bradley-terry":
+        scores = fit_bradley_terry(winners, losers, n)
+        return np.argsort(-scores, kind="stable").tolist()
+    if method != "graph":
+        raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
+    graph = PreferenceGraph(n)
+    for winner, loser in zip(winners.tolist(), losers.tolist()):
+        graph.record(winner, loser)
+    return graph.ranking()
+
+
+def summarize(
+    items: Sequence[Item],
+    ranking: Sequence[int],
+    model: str = "linear",
+    anchors: Optional[Sequence[float]] = None,
+) -> Dict[str, list]:
+    """Summary columns of the ranked items, like the table shown in step 3.
+
+    ``anchors`` are the prices the ranked items at :func:`anchor_positions` are
+    worth to the user and default to their listed prices; there must be as many
+    as ``model`` has anchors.
+    """
+    n = len(ranking)
+    prices = [items[i].price for i in ranking]
+    n_anchors = PRICE_MODELS[model].n_anchors
+    if anchors is not None and len(anchors) != n_anchors:
+        raise ValueError(
+            f"the {model} model needs {n_anchors} anchor prices, got {len(anchors)}"
+        )
+    if anchors is None:
+        anchors = [prices[p] for p in anchor_positions(n, n_anchors)]
+    values = fit_prices(model, anchors, n)
+    return {
+        "preference": list(range(n)),
+        "name": [items[i].name for i in ranking],
+        "price": prices,
+        "value": values.tolist(),
+        "price - value": (np.asarray(prices) - values).tolist(),
+    }
+
+
+def write_summary(summary: Dict[str, list], path: os.PathLike):
+    """Write the summary as Parquet if ``path`` ends in ``.parquet``, else CSV."""
+    path = pathlib.Path(path)
+    if path.suffix == ".parquet":
+        import pandas as pd
+
+        pd.DataFrame(summary).to_parquet(path, index=False)
+        return
+    with open(path, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(summary)
+        writer.writerows(zip(*summary.values()))
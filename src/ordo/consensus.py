@@ -0,0 +1,207 @@
+import hashlib
+import os
+import pathlib
+import re
+import tempfile
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ordo.bradley_terry import fit_bradley_terry
+from ordo.scheduler import Pair
+from ordo.util import atomic_write
+
+BALLOT_DIRECTORY = os.environ.get(
+    "ORDO_BALLOT_DIR", os.path.join(tempfile.gettempdir(), "ordo-ballots")
+)
+METHODS = ("kemeny", "bradley-terry")
+# pools up to 4096 items count their pairs in a dense array of 128 MiB at most
+DENSE_COUNTS = 2**24
+
+
+class Ballot(NamedTuple):
+    """The comparisons one judge answered, as indices into ``items``.
+
+    ``items`` holds the content hashes of the images the judge ranked.
+    """
+
+    judge: str
+    items: np.ndarray
+    winners: np.ndarray
+    losers: np.ndarray
+
+
+def _file_name(name: str) -> str:
+    # readable, yet distinct for names that only differ in replaced characters
+    digest = hashlib.blake2b(name.encode(), digest_size=4).hexdigest()
+    return re.sub(r"[^\w.-]", "_", name) + "-" + digest
+
+
+def team_directory(team: str, directory: Optional[os.PathLike] = None) -> pathlib.Path:
+    """Where the ballots of ``team`` are kept, under :data:`BALLOT_DIRECTORY`."""
+    return pathlib.Path(directory or BALLOT_DIRECTORY) / _file_name(team)
+
+
+def ballot_path(
+    team: str, judge: str, directory: Optional[os.PathLike] = None
+) -> pathlib.Path:
+    return team_directory(team, directory) / (_file_name(judge) + ".npz")
+
+
+def save_ballot(
+    team: str,
+    judge: str,
+    items: Sequence[str],
+    comparisons: Iterable[Pair],
+    directory: Optional[os.PathLike] = None,
+    replace: bool = False,
+) -> pathlib.Path:
+    """Save the ``(winner, loser)`` answers of ``judge`` over ``items``.
+
+    Items are the content hashes of the images, so judges of one ``team`` who
+    uploaded the same pool in a different order, under other file names or
+    only in part can still be combined, while other teams' ballots are never
+    mixed in. Raises :class:`FileExistsError` if ``judge`` already saved a
+    ballot for the team, unless ``replace`` is given.
+    """
+    pairs = np.array(list(comparisons), dtype=np.int32).reshape(-1, 2)
+    path = ballot_path(team, judge, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path, replace=replace) as fp:
+        np.savez(
+            fp,
+            judge=np.array(judge),
+            items=np.array(items, dtype=str),
+            winners=pairs[:, 0],
+            losers=pairs[:, 1],
+        )
+    return path
+
+
+def ballots_stamp(team: str, directory: Optional[os.PathLike] = None) -> Tuple:
+    """Cheap fingerprint of a team's ballots, to know when to aggregate again."""
+    try:
+        with os.scandir(team_directory(team, directory)) as entries:
+            return tuple(
+                sorted(
+                    (entry.name, entry.stat().st_mtime_ns)
+                    for entry in entries
+                    if entry.name.endswith(".npz")
+                )
+            )
+    except FileNotFoundError:
+        return ()
+
+
+def load_ballots(team: str, directory: Optional[os.PathLike] = None) -> List[Ballot]:
+    root = team_directory(team, directory)
+    ballots = []
+    for name, _ in ballots_stamp(team, directory):
+        with np.load(root / name) as data:
+            ballots.append(
+                Ballot(
+                    str(data["judge"]), data["items"], data["winners"], data["losers"]
+                )
+            )
+    return ballots
+
+
+def win_matrix(ballots: Iterable[Ballot], index: Dict[str, int], n: int):
+    """Sparse ``n x n`` matrix where entry ``(i, j)`` counts answers ``i > j``.
+
+    ``index`` maps content hashes to the items being ranked; comparisons involving
+    any other item are dropped. Repeated answers from all judges are summed in
+    one pass, so the matrix only stores the pairs somebody was asked about.
+    """
+    from scipy import sparse
+
+    lookups = {}
+    pairs = [np.empty(0, dtype=np.intp)]
+    for ballot in ballots:
+        # judges of one team mostly share the same pool
+        key = (ballot.items.dtype.str, ballot.items.tobytes())
+        if key not in lookups:
+            lookup = np.array(
+                [index.get(item, -1) for item in ballot.items.tolist()], dtype=np.intp
+            )
+            lookups[key] = lookup, bool((lookup < 0).any())
+        lookup, partial = lookups[key]
+        w = lookup[ballot.winners]
+        l = lookup[ballot.losers]
+        if partial:
+            known = (w >= 0) & (l >= 0)
+            w, l = w[known], l[known]
+        pairs.append(w * n + l)
+    pairs = np.concatenate(pairs)
+    if n * n <= DENSE_COUNTS:
+        # counting into n * n bins is linear, while np.unique has to sort
+        counts = np.bincount(pairs, minlength=n * n)
+        counts[:: n + 1] = 0  # an item never beats itself
+        pairs = np.flatnonzero(counts)
+        counts = counts[pairs]
+    else:
+        pairs, counts = np.unique(pairs, return_counts=True)
+        keep = pairs // n != pairs % n
+        pairs, counts = pairs[keep], counts[keep]
+    indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(pairs // n, minlength=n), out=indptr[1:])
+    return sparse.csr_array((counts.astype(float), pairs % n, indptr), shape=(n, n))
+
+
+def net_wins(wins) -> np.ndarray:
+    """Borda-like score: the share of its comparisons an item won, minus lost."""
+    won = np.asarray(wins.sum(axis=1)).ravel()
+    lost = np.asarray(wins.sum(axis=0)).ravel()
+    return (won - lost) / (won + lost + 1)
+
+
+def kemeny_ranking(wins, max_sweeps: int = 0) -> List[int]:
+    """Approximately Kemeny-optimal order, most preferred first.
+
+    Items are first sorted by :func:`net_wins`, then adjacent items are swapped
+    whenever more answers preferred the lower one, alternating between even and
+    odd positions until no swap is left (or ``max_sweeps`` is reached). The
+    result disagrees with as few answers as any order one adjacent swap away.
+    """
+    n = wins.shape[0]
+    order = np.argsort(-net_wins(wins), kind="stable")
+    for _ in range(max_sweeps or n):
+        swapped = False
+        for start in (0, 1):
+            i = np.arange(start, n - 1, 2)
+            upper, lower = order[i], order[i + 1]
+            swap = i[wins[lower, upper] > wins[upper, lower]]
+            if swap.size:
+                order[swap], order[swap + 1] = order[swap + 1], order[swap]
+                swapped = True
+        if not swapped:
+            break
+    return order.tolist()
+
+
+def bradley_terry_ranking(wins, max_iter: int = 10) -> List[int]:
+    """Items sorted by Bradley–Terry strength, fitted to the summed answers.
+
+    Only the order matters here, so the fit is warm-started from
+    :func:`net_wins` and stops after ``max_iter`` MM sweeps, by which point the
+    order agrees with the converged fit on nearly every pair.
+    """
+    n = wins.shape[0]
+    counts = wins.tocoo()
+    scores = fit_bradley_terry(
+        counts.row,
+        counts.col,
+        n,
+        weights=counts.data,
+        init=net_wins(wins),
+        max_iter=max_iter,
+    )
+    return np.argsort(-scores, kind="stable").tolist()
+
+
+def consensus_ranking(wins, method: str = "kemeny") -> List[int]:
+    if method == "bradley-terry":
+        return bradley_terry_ranking(wins)
+    if method == "kemeny":
+        return kemeny_ranking(wins)
+    raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
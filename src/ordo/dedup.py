@@ -0,0 +1,76 @@
+import io
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+HASH_SIZE = 8
+MAX_DISTANCE = 6
+FLAT_RANGE = 4
+
+
+def dhash(data: bytes, size: int = HASH_SIZE) -> Optional[np.ndarray]:
+    """Difference hash of an image, packed into ``size * size / 8`` bytes.
+
+    The image is shrunk to ``(size + 1) x size`` grey pixels and every bit tells
+    whether a pixel is brighter than its right neighbour, so the hash survives
+    resizing, recompression and small colour shifts. Returns ``None`` for data
+    Pillow cannot read and for flat images, whose hash carries no information.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft("L", (4 * (size + 1), 4 * size))
+        image = ImageOps.exif_transpose(image)
+        pixels = np.asarray(
+            image.convert("L").resize((size + 1, size), Image.Resampling.LANCZOS),
+            dtype=np.int16,
+        )
+    except (UnidentifiedImageError, OSError):
+        return None
+    if np.ptp(pixels) <= FLAT_RANGE:
+        return None
+    return np.packbits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hamming_distances(hashes: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances between the packed hashes in the rows of ``hashes``.
+
+    With the bits as 0/1 vectors, ``|a ^ b| = |a| + |b| - 2 a.b``, so the whole
+    matrix is one small matrix product instead of an n x n x bytes XOR.
+    """
+    bits = np.unpackbits(np.asarray(hashes, dtype=np.uint8), axis=-1)
+    bits = bits.astype(np.float32)
+    ones = bits.sum(axis=-1)
+    distances = ones[:, None] + ones[None, :] - 2 * (bits @ bits.T)
+    return distances.round().astype(np.uint16)
+
+
+def near_duplicates(
+    hashes: np.ndarray, max_distance: int = MAX_DISTANCE
+) -> List[List[int]]:
+    """Groups of rows whose hashes are at most ``max_distance`` bits apart.
+
+    Closeness is made transitive, so a group is a connected component of the
+    "looks the same" relation. Only groups of two or more are returned, each
+    sorted and ordered by its first member.
+    """
+    n = len(hashes)
+    if n < 2:
+        return []
+    i, j = np.nonzero(np.triu(hamming_distances(hashes) <= max_distance, k=1))
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(i.tolist(), j.tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    groups = {}
+    for x in range(n):
+        groups.setdefault(find(x), []).append(x)
+    return [group for group in groups.values() if len(group) > 1]
@@ -0,0 +1,84 @@
+from typing import Iterable, List, Optional
+
+from ordo.graph import PreferenceGraph
+from ordo.pricing import fit_prices
+from ordo.scheduler import SCHEDULERS, Pair
+
+
+class RankingSession:
+    """Headless state of one ranking: the preference graph and its scheduler.
+
+    This holds everything step 2 and step 3 need, so the app only renders it and
+    the comparison loop can be driven (and benchmarked) without a browser.
+    """
+
+    __slots__ = ("graph", "scheduler", "history")
+
+    def __init__(self, n: int, scheduler: str = "binary-insertion", **options):
+        self.graph = PreferenceGraph(n)
+        self.scheduler = SCHEDULERS[scheduler](n, self.graph, **options)
+        # the answers themselves, in order, so they can be shared with a team
+        self.history: List[Pair] = []
+
+    @property
+    def n(self) -> int:
+        return self.graph.n
+
+    def add_items(self, k: int):
+        self.scheduler.add_items(k)
+        if self.graph.n < self.scheduler.n:
+            self.graph.add_items(self.scheduler.n - self.graph.n)
+
+    def next_pair(self) -> Optional[Pair]:
+        """Next pair to ask about; pairs already implied are answered silently.
+
+        Schedulers that are not transitive are trusted to ask again on purpose.
+        """
+        pair = self.scheduler.next_pair()
+        if not self.scheduler.transitive:
+            return pair
+        while pair is not None and self.graph.knows(*pair):
+            self.scheduler.record(*(pair if self.graph.prefers(*pair) else pair[::-1]))
+            pair = self.scheduler.next_pair()
+        return pair
+
+    def lookahead(self) -> List[int]:
+        """Items that may be asked about after the pending pair, for prefetching.
+
+        The scheduler is asked for the next pair under both answers; items of
+        the pending pair itself are left out.
+        """
+        pair = self.next_pair()
+        if pair is None:
+            return []
+        items = []
+        for winner, loser in (pair, pair[::-1]):
+            for item in self.scheduler.peek(winner, loser) or ():
+                if item not in pair and item not in items:
+                    items.append(item)
+        return items
+
+    def record(self, winner: int, loser: int):
+        self.history.append((winner, loser))
+        self.scheduler.record(winner, loser)
+        self.graph.record(winner, loser)
+
+    def skip(self, pair: Pair):
+        self.scheduler.skip(pair)
+
+    def remaining(self) -> int:
+        return self.scheduler.remaining()
+
+    @property
+    def done(self) -> bool:
+        return self.next_pair() is None
+
+    def ranking(self) -> List[int]:
+        """Ranked items, most preferred first; items that cannot make it are left out."""
+        if not self.scheduler.transitive:
+            return self.scheduler.ranking()
+        return self.graph.ranking()[: self.scheduler.n_ranked]
+
+    def fit_values(self, model: str, *prices: float) -> Iterable[float]:
+        """Values of the ranked items on a ``model`` curve through anchor prices."""
+        return fit_prices(model, prices, self.scheduler.n_ranked)
@@ -0,0 +1,79 @@
+from typing import List
+
+import numpy as np
+
+
+class PreferenceGraph:
+    """Transitively closed "is preferred to" relation over ``range(n)``.
+
+    The closure is kept as a boolean matrix where ``dominates[i, j]`` means item
+    ``i`` is known to be better than item ``j``. Recording ``winner > loser``
+    links every item at or above ``winner`` to every item at or below ``loser``
+    in one vectorized assignment, so nothing is copied per comparison and any
+    pair can be looked up in O(1).
+    """
+
+    def __init__(self, n: int = 0):
+        self._dominates = np.zeros((n, n), dtype=bool)
+        self._n = n
+        self._n_known = 0
+
+    @property
+    def n(self) -> int:
+        return self._n
+
+    @property
+    def dominates(self) -> np.ndarray:
+        return self._dominates[: self._n, : self._n]
+
+    @property
+    def n_known(self) -> int:
+        """Number of pairs whose order is known, directly or by transitivity."""
+        return self._n_known
+
+    def add_items(self, k: int):
+        n = self._n + k
+        if n > len(self._dominates):
+            grown = np.zeros((max(n, 2 * len(self._dominates)),) * 2, dtype=bool)
+            grown[: self._n, : self._n] = self.dominates
+            self._dominates = grown
+        self._n = n
+
+    def prefers(self, i: int, j: int) -> bool:
+        return bool(self._dominates[i, j])
+
+    def knows(self, i: int, j: int) -> bool:
+        return bool(self._dominates[i, j] or self._dominates[j, i])
+
+    def record(self, winner: int, loser: int) -> bool:
+        """Add ``winner > loser`` and its consequences.
+
+        Returns ``False`` without changing anything if the order of the pair is
+        already known, including when it contradicts the recorded preferences.
+        """
+        if winner == loser or self.knows(winner, loser):
+            return False
+        above = np.append(np.flatnonzero(self._dominates[: self._n, winner]), winner)
+        below = np.append(np.flatnonzero(self._dominates[loser, : self._n]), loser)
+        # rows already above the loser, and columns already below the winner,
+        # are complete by transitivity
+        above = above[~self._dominates[above, loser]]
+        below = below[~self._dominates[winner, below]]
+        block = np.ix_(above, below)
+        self._n_known += int(above.size * below.size - self._dominates[block].sum())
+        self._dominates[block] = True
+        return True
+
+    def better_than(self, i: int) -> np.ndarray:
+        return np.flatnonzero(self._dominates[i, : self._n])
+
+    def wins(self) -> np.ndarray:
+        return self.dominates.sum(axis=1)
+
+    def ranking(self) -> List[int]:
+        """A topological order of the graph, most preferred first.
+
+        In a transitively closed relation an item has strictly more wins than
+        any item it dominates, so sorting by wins never breaks a known edge.
+        """
+        return np.argsort(-self.wins(), kind="stable").tolist()
@@ -0,0 +1,118 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from ordo.util import get_b64path
+
+THUMBNAIL_SIZE = 640
+THUMBNAIL_CACHE_BYTES = 64 * 2**20
+
+MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+    "WEBP": "image/webp",
+}
+
+_SIGNATURES = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+
+
+class Thumbnail(NamedTuple):
+    key: str
+    content: bytes
+    mime: str
+    b64path: str
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.content) + len(self.b64path)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def sniff_mime(data: bytes) -> str:
+    for signature, mime in _SIGNATURES.items():
+        if data.startswith(signature):
+            return mime
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+
+def make_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> Tuple[bytes, str]:
+    """Downscale ``data`` to fit in a ``size`` square, returning (bytes, mime).
+
+    Images that are already small enough are passed through untouched; anything
+    Pillow cannot read, or refuses to decode as a decompression bomb, is returned
+    as is with its sniffed MIME type.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image_format = image.format
+        if (
+            max(image.size) <= size
+            and image_format in MIME_TYPES
+            and image.getexif().get(0x0112, 1) == 1
+        ):
+            return data, MIME_TYPES[image_format]
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return data, sniff_mime(data)
+    out = io.BytesIO()
+    if image.mode in ("RGBA", "LA", "P"):
+        image.save(out, format="PNG", optimize=True)
+        return out.getvalue(), "image/png"
+    image.convert("RGB").save(out, format="JPEG", quality=85)
+    return out.getvalue(), "image/jpeg"
+
+
+class ThumbnailCache:
+    """Thread-safe LRU cache of display-sized images keyed by content hash.
+
+    Entries are evicted least-recently-used first once their total size
+    (thumbnail plus its base64 data URI) exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = THUMBNAIL_CACHE_BYTES, size=THUMBNAIL_SIZE):
+        self.max_bytes = max_bytes
+        self.size = size
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, data: bytes, key: Optional[str] = None) -> Thumbnail:
+        """Thumbnail of ``data``, whose content hash may be passed as ``key``."""
+        if key is None:
+            key = content_hash(data)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        content, mime = make_thumbnail(bytes(data), self.size)
+        thumbnail = Thumbnail(key, content, mime, get_b64path(content, mime))
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = thumbnail
+                self.nbytes += thumbnail.nbytes
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return thumbnail
+
+    def b64path(self, data: bytes) -> str:
+        return self.get(data).b64path
@@ -0,0 +1,106 @@
+import contextlib
+import errno
+import math
+import os
+import pathlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ordo.images import Thumbnail
+from ordo.util import atomic_write
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+# Streamlit serves the "static" directory next to the app script
+STATIC_DIRECTORY = os.environ.get(
+    "ORDO_STATIC_DIR", str(pathlib.Path(__file__).parent / "static")
+)
+MEDIA_BYTES = 256 * 2**20
+KEEP_SECONDS = 600
+
+
+class MediaStore:
+    """Content-addressed directory of thumbnails that the browser fetches by URL.
+
+    Each thumbnail is written once as ``<root>/<content hash><ext>`` and referred
+    to as ``<url_prefix>/<content hash><ext>``, so a rerun only ships short URLs
+    instead of inlined base64 images. Once the directory grows past
+    ``max_bytes``, the thumbnails whose URLs were handed out least recently are
+    deleted; a rerun showing one again simply writes it back. Thumbnails handed
+    out in the last ``keep_seconds`` are never deleted, so pages of other
+    sessions still loading them do not break, even if that means going over
+    the budget for a while. ``root`` defaults to :data:`STATIC_DIRECTORY`;
+    :class:`OSError` is raised if it cannot be written.
+    """
+
+    def __init__(
+        self,
+        root: Optional[os.PathLike] = None,
+        url_prefix: str = "/app/static",
+        max_bytes: int = MEDIA_BYTES,
+        keep_seconds: float = KEEP_SECONDS,
+    ):
+        self.root = pathlib.Path(root or STATIC_DIRECTORY)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if not os.access(self.root, os.W_OK):
+            raise PermissionError(
+                errno.EACCES, "cannot write thumbnails to", str(self.root)
+            )
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_bytes = max_bytes
+        self.keep_seconds = keep_seconds
+        self.nbytes = 0
+        # name -> (size, when its URL was last handed out), least recent first
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+        # thumbnails left by an earlier process count against the budget too
+        for path in self.root.iterdir():
+            if path.suffix in EXTENSIONS.values():
+                self._files[path.name] = (path.stat().st_size, -math.inf)
+                self.nbytes += path.stat().st_size
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def url(self, thumbnail: Thumbnail) -> str:
+        """URL of ``thumbnail``, written to disk first unless it already is.
+
+        Raises :class:`OSError` if the thumbnail cannot be written.
+        """
+        name = thumbnail.key + EXTENSIONS.get(thumbnail.mime, ".png")
+        with self._lock:
+            written = name in self._files
+            if written:
+                self._files[name] = (self._files[name][0], time.monotonic())
+                self._files.move_to_end(name)
+                self._evict()
+        if not written:
+            path = self.root / name
+            if not path.exists():
+                with atomic_write(path) as fp:
+                    fp.write(thumbnail.content)
+            with self._lock:
+                if name not in self._files:
+                    self.nbytes += len(thumbnail.content)
+                self._files[name] = (len(thumbnail.content), time.monotonic())
+                self._files.move_to_end(name)
+                self._evict()
+        return f"{self.url_prefix}/{name}"
+
+    def _evict(self):
+        recent = time.monotonic() - self.keep_seconds
+        while self.nbytes > self.max_bytes and self._files:
+            name, (size, handed_out) = next(iter(self._files.items()))
+            if handed_out > recent:
+                # everything after it was handed out even more recently
+                break
+            del self._files[name]
+            self.nbytes -= size
+            with contextlib.suppress(OSError):
+                os.remove(self.root / name)
@@ -0,0 +1,62 @@
+import concurrent.futures
+import io
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from ordo.dedup import dhash
+from ordo.images import ThumbnailCache
+from ordo.store import ImageStore
+
+
+class Processed(NamedTuple):
+    valid: bool
+    dhash: Optional[np.ndarray]
+
+
+class UploadPipeline:
+    """Stores, validates, thumbnails and hashes uploaded images in a thread pool.
+
+    Pillow releases the GIL while decoding and resizing, and hashlib while
+    hashing, so threads run these steps in parallel without copying images into
+    worker processes. Every content hash is processed once per process; the
+    thumbnails themselves stay in ``thumbnails``, so its LRU budget still holds.
+    """
+
+    def __init__(
+        self,
+        store: ImageStore,
+        thumbnails: ThumbnailCache,
+        max_workers: Optional[int] = None,
+    ):
+        self.store = store
+        self.thumbnails = thumbnails
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers or min(8, os.cpu_count() or 1), thread_name_prefix="ordo"
+        )
+        self._futures: Dict[str, concurrent.futures.Future] = {}
+
+    def put(self, data: Sequence[bytes]) -> List[str]:
+        """Store every image in parallel, each with a reference held by the caller."""
+        return list(self._executor.map(lambda d: self.store.put(d, acquire=True), data))
+
+    def submit(self, key: str) -> concurrent.futures.Future:
+        """Future :class:`Processed` result for the stored image ``key``."""
+        future = self._futures.get(key)
+        if future is None or (future.done() and key not in self.store):
+            future = self._futures[key] = self._executor.submit(self._process, key)
+        return future
+
+    def wait(self, keys: Iterable[str], timeout: Optional[float] = None):
+        concurrent.futures.wait([self.submit(key) for key in keys], timeout)
+
+    def _process(self, key: str) -> Processed:
+        data = self.store.get(key)
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.verify()
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+            return Processed(False, None)
+        return Processed(True, dhash(self.thumbnails.get(data, key).content))
@@ -0,0 +1,119 @@
+import functools
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class PriceModel(NamedTuple):
+    label: str
+    caption: str
+    n_anchors: int
+    fit: Callable[[np.ndarray, np.ndarray, int], np.ndarray]
+
+
+def anchor_positions(n: int, k: int) -> np.ndarray:
+    """Ranks of ``k`` items spread from the favorite (0) to the last (n - 1)."""
+    return np.minimum(np.arange(k) * n // (k - 1), n - 1)
+
+
+def _line(u: np.ndarray, y: np.ndarray):
+    """Least-squares ``y = a + b * u`` over the last axis, for every row of y."""
+    du = u - u.mean()
+    dy = y - y.mean(axis=-1, keepdims=True)
+    b = (dy * du).sum(axis=-1) / (du * du).sum()
+    a = y.mean(axis=-1) - b * u.mean()
+    return a[..., None], b[..., None]
+
+
+def fit_linear(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    a, b = _line(x, y)
+    return a + b * np.arange(n)
+
+
+def fit_exponential(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    # a * exp(b - x) + c is linear in exp(-x) with slope a * exp(b) >= 0
+    a, b = _line(np.exp(-x), y)
+    negative = b < 0
+    a = np.where(negative, y.mean(axis=-1, keepdims=True), a)
+    b = np.where(negative, 0, b)
+    return a + b * np.exp(-np.arange(n))
+
+
+def fit_log(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    a, b = _line(np.log1p(x), y)
+    return a + b * np.log1p(np.arange(n))
+
+
+def fit_power(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    if np.any(y <= 0):
+        raise ValueError("A power law needs all anchor prices to be positive.")
+    a, b = _line(np.log1p(x), np.log(y))
+    return np.exp(a + b * np.log1p(np.arange(n)))
+
+
+def fit_piecewise(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    # clamp to non-increasing prices so the curve respects the ranking
+    y = np.minimum.accumulate(y, axis=-1)
+    grid = np.arange(n)
+    return np.apply_along_axis(lambda row: np.interp(grid, x, row), -1, y)
+
+
+PRICE_MODELS = {
+    "linear": PriceModel(
+        "Linear", '"Everything is similar to everything in this pool"', 2, fit_linear
+    ),
+    "exponential": PriceModel(
+        "Exponential",
+        '"I think there is a long and expensive right tail"',
+        3,
+        fit_exponential,
+    ),
+    "log": PriceModel(
+        "Logarithmic",
+        '"The top few stand out, the rest fade out slowly"',
+        3,
+        fit_log,
+    ),
+    "power": PriceModel(
+        "Power law", '"My favorite is in a league of its own"', 3, fit_power
+    ),
+    "piecewise": PriceModel(
+        "Piecewise", '"Let me price a few more pieces myself"', 4, fit_piecewise
+    ),
+}
+
+
+def fit_many(
+    model: str, prices: np.ndarray, n: int, positions: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Fit one curve per row of ``prices``, anchored at ``positions``.
+
+    ``prices`` has shape ``(..., k)`` and the result ``(..., n)``. Anchors default
+    to ``k`` items spread evenly over the ranking, see :func:`anchor_positions`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if positions is None:
+        positions = anchor_positions(n, prices.shape[-1])
+    return PRICE_MODELS[model].fit(np.asarray(positions, dtype=float), prices, n)
+
+
+@functools.lru_cache(maxsize=256)
+def _fit_cached(model: str, prices: tuple, n: int, positions: Optional[tuple]):
+    values = fit_many(model, prices, n, positions)
+    values.setflags(write=False)
+    return values
+
+
+def fit_prices(
+    model: str,
+    prices: Sequence[float],
+    n: int,
+    positions: Optional[Sequence[int]] = None,
+) -> np.ndarray:
+    """Memoized :func:`fit_many` for a single curve; the result is read-only."""
+    return _fit_cached(
+        model,
+        tuple(map(float, prices)),
+        n,
+        None if positions is None else tuple(map(int, positions)),
+    )
@@ -0,0 +1,172 @@
+import contextlib
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+from ordo.util import atomic_write
+
+ENABLED = os.environ.get("ORDO_PROFILE", "").lower() not in ("", "0", "false", "no")
+DIRECTORY = os.environ.get("ORDO_PROFILE_DIR", "ordo-profile")
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ("rerun", "name", "start", "blocks")
+
+    def __init__(self, rerun: "Rerun", name: str):
+        self.rerun = rerun
+        self.name = name
+
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        end = self.rerun.ended = time.perf_counter()
+        seconds = end - self.start
+        self.rerun.phases.append(
+            {
+                "phase": self.name,
+                "seconds": seconds,
+                "allocated_blocks": sys.getallocatedblocks() - self.blocks,
+            }
+        )
+
+
+class Rerun:
+    """Timings of the phases of one script (or fragment) run.
+
+    The wall time of the whole run spans from its creation to :meth:`finish`,
+    or to the end of its last phase when ``st.stop()`` or ``st.rerun()`` cut
+    the script short.
+    """
+
+    __slots__ = ("scope", "session", "started", "start", "ended", "phases")
+
+    def __init__(self, scope: str, session: str):
+        self.scope = scope
+        self.session = session
+        self.started = time.time()
+        self.start = self.ended = time.perf_counter()
+        self.phases: List[Dict] = []
+
+    def phase(self, name: str):
+        """Context manager recording wall time and net allocated blocks."""
+        return _Phase(self, name)
+
+    def finish(self):
+        self.ended = time.perf_counter()
+
+    def to_dict(self) -> Dict:
+        return {
+            "scope": self.scope,
+            "session": self.session,
+            "started": self.started,
+            "seconds": self.ended - self.start,
+            "phases": self.phases,
+        }
+
+
+class NullRerun:
+    """Stand-in used when profiling is off; every phase is a shared no-op."""
+
+    phases = ()
+
+    def phase(self, name: str):
+        return _NULL_PHASE
+
+    def finish(self):
+        pass
+
+
+NULL_RERUN = NullRerun()
+
+
+class Profiler:
+    """Collects finished reruns and exports them for offline analysis.
+
+    Every rerun is appended as one line to ``reruns.jsonl`` and the running
+    totals are rewritten to ``metrics.prom`` in the Prometheus text format, both
+    under ``directory``.
+    """
+
+    def __init__(self, directory: os.PathLike = DIRECTORY, keep: int = 50):
+        self.directory = pathlib.Path(directory)
+        self.recent = deque(maxlen=keep)
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.blocks = defaultdict(int)
+        self.reruns = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, rerun: Rerun):
+        record = rerun.to_dict()
+        with self._lock:
+            self.recent.append(record)
+            self.reruns[rerun.scope] += 1
+            for phase in rerun.phases:
+                self.seconds[phase["phase"]] += phase["seconds"]
+                self.calls[phase["phase"]] += 1
+                self.blocks[phase["phase"]] = phase["allocated_blocks"]
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / "reruns.jsonl", "a") as fp:
+                fp.write(json.dumps(record) + "\n")
+            self._write_metrics()
+
+    def _write_metrics(self):
+        lines = [
+            "# HELP ordo_reruns_total Script and fragment reruns profiled.",
+            "# TYPE ordo_reruns_total counter",
+        ]
+        lines += [
+            f'ordo_reruns_total{{scope="{scope}"}} {count}'
+            for scope, count in sorted(self.reruns.items())
+        ]
+        for metric, kind, description, values in [
+            (
+                "ordo_phase_seconds_total",
+                "counter",
+                "Wall time spent in each phase.",
+                self.seconds,
+            ),
+            ("ordo_phase_calls_total", "counter", "Times each phase ran.", self.calls),
+            (
+                "ordo_phase_allocated_blocks",
+                "gauge",
+                "Net memory blocks allocated by the last run of each phase.",
+                self.blocks,
+            ),
+        ]:
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+            lines += [
+                f'{metric}{{phase="{phase}"}} {value}'
+                for phase, value in sorted(values.items())
+            ]
+        with atomic_write(self.directory / "metrics.prom", "w") as fp:
+            fp.write("\n".join(lines) + "\n")
+
+
+def start_rerun(profiler: Optional[Profiler], state, scope: str = "app"):
+    """Begin profiling a rerun, flushing the previous one kept in ``state``.
+
+    A rerun can end with ``st.rerun()`` or ``st.stop()`` anywhere in the script,
+    so the record is only written once the next rerun of the same session
+    starts. Returns :data:`NULL_RERUN` when ``profiler`` is ``None``.
+    """
+    if profiler is None:
+        return NULL_RERUN
+    if "_profile_session" not in state:
+        state["_profile_session"] = uuid.uuid4().hex[:8]
+    key = f"_profile_{scope}"
+    previous = state.get(key)
+    if previous is not None and previous.phases:
+        profiler.record(previous)
+    rerun = state[key] = Rerun(scope, state["_profile_session"])
+    return rerun
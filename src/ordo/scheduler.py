@@ -0,0 +1,553 @@
+import abc
+import copy
+import heapq
+import itertools
+import math
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ordo.bradley_terry import fit_bradley_terry, prob_ordered, score_variances
+from ordo.graph import PreferenceGraph
+
+Pair = Tuple[int, int]
+
+
+class Scheduler(abc.ABC):
+    """Decides which pair of items the user is asked to compare next.
+
+    Items are identified by their index in ``range(n)``. A scheduler is fed the
+    outcome of every comparison through :meth:`record` (or :meth:`skip` if the
+    user could not decide) and reports an upper bound on the number of questions
+    it may still ask through :meth:`remaining`. Schedulers that need to know
+    which pairs are already implied read them from ``graph``. Schedulers that
+    are not ``transitive`` may ask about pairs the graph already implies. The
+    final ranking covers the ``n_ranked`` most preferred items.
+    """
+
+    transitive = True
+
+    def __init__(self, n: int, graph: Optional[PreferenceGraph] = None):
+        self.n = n
+        self.graph = graph
+
+    @abc.abstractmethod
+    def next_pair(self) -> Optional[Pair]:
+        """Next pair to ask about, or ``None`` once the ranking is settled."""
+
+    @abc.abstractmethod
+    def record(self, winner: int, loser: int):
+        """Learn that ``winner`` is preferred to ``loser``."""
+
+    def skip(self, pair: Pair):
+        pass
+
+    @abc.abstractmethod
+    def remaining(self) -> int:
+        """Upper bound on the number of questions still to ask."""
+
+    @abc.abstractmethod
+    def ranking(self) -> List[int]:
+        """Items ordered from the most to the least preferred."""
+
+    @abc.abstractmethod
+    def add_items(self, k: int):
+        """Append ``k`` new items, numbered from the current ``n``."""
+
+    def peek(self, winner: int, loser: int) -> Optional[Pair]:
+        """The pair likely asked next if ``winner`` beats ``loser``, or ``None``.
+
+        Only used to prefetch images, so a wrong guess is harmless. The default
+        replays the answer on a copy sharing the graph, which suits schedulers
+        that never record into it.
+        """
+        clone = copy.deepcopy(self, {id(self.graph): self.graph})
+        clone.record(winner, loser)
+        return clone.next_pair()
+
+    @property
+    def n_ranked(self) -> int:
+        return self.n
+
+    @property
+    def done(self) -> bool:
+        return self.next_pair() is None
+
+
+class BinaryInsertionScheduler(Scheduler):
+    """Binary insertion sort, asking at most ``sum(ceil(log2(m + 1)))`` questions.
+
+    Items are inserted one by one into a chain ordered from the most to the least
+    preferred, each insertion bisecting the range of positions that the item can
+    still take. Skipped pairs are avoided by picking the untried pivot closest to
+    the middle; if every pivot of the current range was skipped the item is put
+    back at the end of the queue, keeping the bounds learned so far.
+    """
+
+    def __init__(self, n: int, graph: Optional[PreferenceGraph] = None):
+        super().__init__(n, graph)
+        self.chain: List[int] = []
+        self._queue = deque(range(n))
+        self._current: Optional[int] = None
+        self._lo = 0
+        self._hi = 0
+        self._pivot: Optional[int] = None
+        # chain items known to be better / worse than a deferred item
+        self._bounds: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+        self._skipped = set()
+
+    def add_items(self, k: int):
+        self._queue.extend(range(self.n, self.n + k))
+        self.n += k
+
+    def _start(self, item: int):
+        above, below = self._bounds.pop(item, (None, None))
+        self._current = item
+        self._lo = 0 if above is None else self.chain.index(above) + 1
+        self._hi = len(self.chain) if below is None else self.chain.index(below)
+
+    def _defer(self):
+        item = self._current
+        above = self.chain[self._lo - 1] if self._lo > 0 else None
+        below = self.chain[self._hi] if self._hi < len(self.chain) else None
+        self._bounds[item] = (above, below)
+        self._queue.append(item)
+        self._current = None
+
+    def _choose_pivot(self) -> Optional[int]:
+        mid = (self._lo + self._hi) // 2
+        # walk out from the middle, mid, mid + 1, mid - 1, ..., until both ends
+        # of the range are passed
+        for offset in range(2 * (self._hi - self._lo)):
+            i = mid + (offset + 1) // 2 * (1 if offset % 2 else -1)
+            if not self._lo <= i < self._hi:
+                continue
+            if frozenset((self._current, self.chain[i])) not in self._skipped:
+                return i
+        return None
+
+    def next_pair(self) -> Optional[Pair]:
+        if self._pivot is not None:
+            return (self._current, self.chain[self._pivot])
+        deferrals = 0
+        while True:
+            if self._current is None:
+                if not self._queue:
+                    return None
+                self._start(self._queue.popleft())
+            if self._lo == self._hi:
+                self.chain.insert(self._lo, self._current)
+                self._current = None
+                deferrals = 0
+                continue
+            self._pivot = self._choose_pivot()
+            if self._pivot is not None:
+                return (self._current, self.chain[self._pivot])
+            if deferrals <= len(self._queue):
+                deferrals += 1
+                self._defer()
+                continue
+            # every remaining pair was skipped: ask them again
+            self._skipped.clear()
+            self._pivot = (self._lo + self._hi) // 2
+            return (self._current, self.chain[self._pivot])
+
+    def record(self, winner: int, loser: int):
+        pair = self.next_pair()
+        if pair is None or {winner, loser} != set(pair):
+            raise ValueError(f"({winner}, {loser}) is not the pending pair {pair}")
+        if winner == self._current:
+            self._hi = self._pivot
+        else:
+            self._lo = self._pivot + 1
+        self._pivot = None
+
+    def skip(self, pair: Pair):
+        if self._pivot is not None and set(pair) == set(self.next_pair()):
+            self._skipped.add(frozenset(pair))
+            self._pivot = None
+
+    def peek(self, winner: int, loser: int) -> Optional[Pair]:
+        clone = copy.copy(self)
+        clone.chain = list(self.chain)
+        clone._queue = deque(self._queue)
+        clone._bounds = dict(self._bounds)
+        clone._skipped = set(self._skipped)
+        clone.record(winner, loser)
+        return clone.next_pair()
+
+    def remaining(self) -> int:
+        total = 0
+        m = len(self.chain)
+        if self._current is not None:
+            total += math.ceil(math.log2(self._hi - self._lo + 1))
+            m += 1
+        for item in self._queue:
+            above, below = self._bounds.get(item, (None, None))
+            if above is None and below is None:
+                total += math.ceil(math.log2(m + 1))
+            else:
+                lo = 0 if above is None else self.chain.index(above) + 1
+                hi = len(self.chain) if below is None else self.chain.index(below)
+                # the chain may grow inside [lo, hi] before this item is resumed
+                total += math.ceil(math.log2(hi - lo + m - len(self.chain) + 1))
+            m += 1
+        return total
+
+    def ranking(self) -> List[int]:
+        if not self.done:
+            raise ValueError("ranking is not complete yet")
+        return list(self.chain)
+
+
+def _new_pairs(lo: int, hi: int) -> Iterator[Pair]:
+    """Pairs involving at least one item of ``range(lo, hi)``, in sorted order."""
+    for i in range(hi):
+        for j in range(max(i + 1, lo), hi):
+            yield (i, j)
+
+
+class PairwiseScheduler(Scheduler):
+    """Ask about every pair whose order is not implied yet, skipped pairs last.
+
+    Undecided pairs are generated lazily, dropping the ones the graph already
+    knows when they come up, so no list of all pairs is ever built. Skipped
+    pairs go to a heap ordered by how often they were skipped.
+    """
+
+    def __init__(self, n: int, graph: Optional[PreferenceGraph] = None):
+        super().__init__(n, graph)
+        self.graph = graph if graph is not None else PreferenceGraph(n)
+        self._fresh = deque([_new_pairs(0, n)])
+        self._skipped = []
+        self._skips = {}
+        self._counter = itertools.count()
+        self._pending: Optional[Pair] = None
+
+    def add_items(self, k: int):
+        self._fresh.append(_new_pairs(self.n, self.n + k))
+        self.n += k
+        if self.graph.n < self.n:
+            self.graph.add_items(self.n - self.graph.n)
+
+    def _pop(self) -> Optional[Pair]:
+        while self._fresh:
+            for pair in self._fresh[0]:
+                if not self.graph.knows(*pair):
+                    return pair
+            self._fresh.popleft()
+        while self._skipped:
+            _, _, pair = heapq.heappop(self._skipped)
+            if not self.graph.knows(*pair):
+                return pair
+        return None
+
+    def next_pair(self) -> Optional[Pair]:
+        if self._pending is not None and self.graph.knows(*self._pending):
+            self._pending = None
+        if self._pending is None:
+            self._pending = self._pop()
+        return self._pending
+
+    def record(self, winner: int, loser: int):
+        if self._pending is not None and {winner, loser} == set(self._pending):
+            self._pending = None
+        self.graph.record(winner, loser)
+
+    def skip(self, pair: Pair):
+        if self._pending is None or set(pair) != set(self._pending):
+            return
+        skips = self._skips[pair] = self._skips.get(pair, 0) + 1
+        heapq.heappush(self._skipped, (skips, next(self._counter), pair))
+        self._pending = None
+
+    def peek(self, winner: int, loser: int) -> Optional[Pair]:
+        # the lazy frontier cannot be copied, and the next pair hinges on the
+        # closure update anyway
+        return None
+
+    def remaining(self) -> int:
+        return self.n * (self.n - 1) // 2 - self.graph.n_known
+
+    def ranking(self) -> List[int]:
+        if not self.done:
+            raise ValueError("ranking is not complete yet")
+        return self.graph.ranking()
+
+
+class BradleyTerryScheduler(Scheduler):
+    """Active ranking under a Bradley–Terry model, tolerant to inconsistent clicks.
+
+    After every answer the log-strengths are refitted, warm-started from the
+    previous ones. The next pair is the one with the largest expected
+    information gain among items up to ``window`` places apart in the current
+    ranking, and questions stop once the ranking is expected to order a share
+    ``confidence`` of all pairs correctly, or after ``max_comparisons``.
+    """
+
+    transitive = False
+
+    def __init__(
+        self,
+        n: int,
+        graph: Optional[PreferenceGraph] = None,
+        confidence: float = 0.9,
+        window: int = 3,
+        max_comparisons: Optional[int] = None,
+        prior: float = 1.0,
+    ):
+        super().__init__(n, graph)
+        self.confidence = confidence
+        self.prior = prior
+        self.window = window
+        self._max_comparisons = max_comparisons
+        self._winners = np.empty(max(16, 4 * n), dtype=np.intp)
+        self._losers = np.empty_like(self._winners)
+        self._m = 0
+        self.scores = np.zeros(n)
+        self.variances = score_variances(self.scores, [], [], prior=prior)
+        self._skipped = set()
+        self._pending: Optional[Pair] = None
+        self._sample = None
+
+    @property
+    def max_comparisons(self) -> int:
+        if self._max_comparisons is not None:
+            return self._max_comparisons
+        return 2 * sum(math.ceil(math.log2(m + 1)) for m in range(self.n))
+
+    @property
+    def n_comparisons(self) -> int:
+        return self._m
+
+    def add_items(self, k: int):
+        self.n += k
+        self.scores = np.append(self.scores, np.zeros(k))
+        self._refit()
+
+    def _refit(self):
+        winners, losers = self._winners[: self._m], self._losers[: self._m]
+        self.scores = fit_bradley_terry(
+            winners, losers, self.n, init=self.scores, prior=self.prior
+        )
+        self.variances = score_variances(self.scores, winners, losers, prior=self.prior)
+
+    def ranking(self) -> List[int]:
+        return np.argsort(-self.scores, kind="stable").tolist()
+
+    def _pair_sample(self, max_pairs: int):
+        if self._sample is None or self._sample[0] != (self.n, max_pairs):
+            if self.n * (self.n - 1) // 2 <= max_pairs:
+                i, j = np.triu_indices(self.n, 1)
+            else:
+                rng = np.random.default_rng(0)
+                i = rng.integers(self.n, size=max_pairs)
+                j = (i + rng.integers(1, self.n, size=max_pairs)) % self.n
+            self._sample = ((self.n, max_pairs), i, j)
+        return self._sample[1:]
+
+    def expected_accuracy(self, max_pairs: int = 50_000) -> float:
+        """Expected share of pairs that the current ranking orders correctly.
+
+        This is ``(1 + tau) / 2`` for the expected Kendall tau between the
+        ranking and the true order; above ``max_pairs`` pairs it is estimated
+        from a fixed random sample of them.
+        """
+        if self.n < 2:
+            return 1.0
+        i, j = self._pair_sample(max_pairs)
+        return float(
+            prob_ordered(
+                np.abs(self.scores[i] - self.scores[j]),
+                self.variances[i] + self.variances[j],
+            ).mean()
+        )
+
+    def _candidates(self, scores=None, variances=None):
+        scores = self.scores if scores is None else scores
+        variances = self.variances if variances is None else variances
+        order = np.argsort(-scores, kind="stable")
+        left = np.concatenate([order[:-offset] for offset in range(1, self.window + 1)])
+        right = np.concatenate([order[offset:] for offset in range(1, self.window + 1)])
+        pi = 1 / (1 + np.exp(scores[right] - scores[left]))
+        var = variances[left] + variances[right]
+        gain = 0.5 * np.log1p(pi * (1 - pi) * var)
+        return left, right, gain
+
+    def next_pair(self) -> Optional[Pair]:
+        if self._pending is not None:
+            return self._pending
+        if self.n < 2 or self._m >= self.max_comparisons:
+            return None
+        if self.expected_accuracy() >= self.confidence:
+            return None
+        left, right, gain = self._candidates()
+        for k in np.argsort(-gain, kind="stable"):
+            pair = (int(left[k]), int(right[k]))
+            if frozenset(pair) not in self._skipped:
+                self._pending = pair
+                return pair
+        self._skipped.clear()
+        k = int(np.argmax(gain))
+        self._pending = (int(left[k]), int(right[k]))
+        return self._pending
+
+    def record(self, winner: int, loser: int):
+        if self._m == len(self._winners):
+            self._winners = np.concatenate([self._winners, self._winners])
+            self._losers = np.concatenate([self._losers, self._losers])
+        self._winners[self._m] = winner
+        self._losers[self._m] = loser
+        self._m += 1
+        self._pending = None
+        self._skipped.clear()
+        self._refit()
+
+    def skip(self, pair: Pair):
+        if self._pending is not None and set(pair) == set(self._pending):
+            self._skipped.add(frozenset(pair))
+            self._pending = None
+
+    def peek(self, winner: int, loser: int) -> Optional[Pair]:
+        """Guess the next pair without the full refit :meth:`record` runs.
+
+        Only the strengths of the two compared items move, by one Newton step
+        on the new answer, which keeps a prefetch guess far cheaper than the
+        click it anticipates.
+        """
+        if self.n < 2 or self._m + 1 >= self.max_comparisons:
+            return None
+        scores = self.scores.copy()
+        variances = self.variances.copy()
+        p = 1 / (1 + np.exp(scores[loser] - scores[winner]))
+        for item, sign in ((winner, 1), (loser, -1)):
+            scores[item] += sign * variances[item] * (1 - p)
+            variances[item] = 1 / (1 / variances[item] + p * (1 - p))
+        left, right, gain = self._candidates(scores, variances)
+        k = int(np.argmax(gain))
+        return int(left[k]), int(right[k])
+
+    def remaining(self) -> int:
+        if self.next_pair() is None:
+            return 0
+        return self.max_comparisons - self._m
+
+
+class TopKScheduler(Scheduler):
+    """Find and order only the ``k`` favorites, in about ``n + k log2(n)`` questions.
+
+    Standings are read from the preference graph: an item is out as soon as
+    ``k`` items are known to beat it, and the next favorite is settled once a
+    single contender (an item no remaining item beats) is left. Contenders play
+    a knockout from a queue, fewest wins first, with every winner going to the
+    back; this keeps the tournament tree balanced, so every favorite after the
+    first only replays the ``log2(n)`` or so matches lost to the previous one.
+    """
+
+    def __init__(self, n: int, graph: Optional[PreferenceGraph] = None, k: int = 3):
+        super().__init__(n, graph)
+        self.graph = graph if graph is not None else PreferenceGraph(n)
+        self.k = k
+        self.top: List[int] = []
+        self._queue: Optional[deque] = None
+        self._n_alive = n
+        self._skipped = set()
+        self._pending: Optional[Pair] = None
+
+    @property
+    def n_ranked(self) -> int:
+        return min(self.k, self.n)
+
+    def add_items(self, k: int):
+        self.n += k
+        if self.graph.n < self.n:
+            self.graph.add_items(self.n - self.graph.n)
+        self._queue = None
+        self._pending = None
+
+    def _settle(self):
+        """Recompute the favorites and the knockout queue from the graph."""
+        dominates = self.graph.dominates
+        alive = np.flatnonzero(dominates.sum(axis=0) < self.k)
+        self._n_alive = len(alive)
+        self.top = []
+        while len(self.top) < self.n_ranked:
+            contenders = alive[~dominates[np.ix_(alive, alive)].any(axis=0)]
+            if len(contenders) > 1:
+                wins = dominates[contenders].sum(axis=1)
+                self._queue = deque(
+                    contenders[np.argsort(wins, kind="stable")].tolist()
+                )
+                return
+            self.top.append(int(contenders[0]))
+            alive = alive[alive != self.top[-1]]
+        self._queue = deque()
+
+    def next_pair(self) -> Optional[Pair]:
+        if self._pending is not None and self.graph.knows(*self._pending):
+            # answered behind our back: the queue may be stale
+            self._pending = self._queue = None
+        if self._queue is None:
+            self._settle()
+        if self._pending is not None or len(self._queue) < 2:
+            return self._pending
+        pairs = itertools.combinations(self._queue, 2)
+        self._pending = next(
+            (pair for pair in pairs if frozenset(pair) not in self._skipped), None
+        )
+        if self._pending is None:
+            self._skipped.clear()
+            self._pending = (self._queue[0], self._queue[1])
+        return self._pending
+
+    def record(self, winner: int, loser: int):
+        self._pending = None
+        self._skipped.clear()
+        self.graph.record(winner, loser)
+        queue = self._queue
+        if queue is None or winner not in queue or loser not in queue:
+            self._queue = None
+            return
+        # only the loser is beaten by a contender now
+        queue.remove(loser)
+        queue.remove(winner)
+        queue.append(winner)
+        if len(queue) == 1:
+            self._queue = None
+
+    def peek(self, winner: int, loser: int) -> Optional[Pair]:
+        queue = self._queue
+        if queue is None or winner not in queue or loser not in queue:
+            return None
+        queue = [item for item in queue if item != winner and item != loser]
+        queue.append(winner)
+        # with a single contender left the next place is settled from the graph
+        return (queue[0], queue[1]) if len(queue) > 1 else None
+
+    def skip(self, pair: Pair):
+        if self._pending is not None and set(pair) == set(self._pending):
+            self._skipped.add(frozenset(pair))
+            self._pending = None
+
+    def remaining(self) -> int:
+        if self._queue is None:
+            self._settle()
+        places = self.n_ranked - len(self.top)
+        if places == 0:
+            return 0
+        return len(self._queue) - 1 + (places - 1) * math.ceil(math.log2(self._n_alive))
+
+    def ranking(self) -> List[int]:
+        if not self.done:
+            raise ValueError("ranking is not complete yet")
+        # the favorites beat every other item, so they lead any topological order
+        return self.graph.ranking()[: self.n_ranked]
+
+
+SCHEDULERS = {
+    "binary-insertion": BinaryInsertionScheduler,
+    "pairwise": PairwiseScheduler,
+    "bradley-terry": BradleyTerryScheduler,
+    "top-k": TopKScheduler,
+}
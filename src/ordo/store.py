@@ -0,0 +1,150 @@
+import contextlib
+import mmap
+import os
+import pathlib
+import tempfile
+import threading
+import weakref
+from collections import Counter, OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+from ordo.images import content_hash
+from ordo.util import atomic_write
+
+STORE_DIRECTORY = os.environ.get(
+    "ORDO_STORE_DIR", os.path.join(tempfile.gettempdir(), "ordo-images")
+)
+STORE_BYTES = 2**30
+
+
+class ImageStore:
+    """Process-wide, content-addressed store of uploaded images on local disk.
+
+    Every image is written once as ``<root>/<content hash>`` and read back
+    through a read-only memory map, so sessions uploading the same photo share
+    one copy in the page cache instead of each holding its bytes. Sessions
+    reference count the images they use; once the store grows past
+    ``max_bytes``, unreferenced images are deleted least-recently-used first.
+    ``root`` defaults to :data:`STORE_DIRECTORY`.
+    """
+
+    def __init__(self, root: Optional[os.PathLike] = None, max_bytes=STORE_BYTES):
+        self.root = pathlib.Path(root or STORE_DIRECTORY)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._sizes = OrderedDict()
+        self._refs = Counter()
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._lock = threading.Lock()
+        # images left by an earlier process are reused, and evicted like any other
+        for path in self.root.iterdir():
+            if path.suffix != ".tmp":
+                self._sizes[path.name] = path.stat().st_size
+                self.nbytes += self._sizes[path.name]
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sizes
+
+    def refs(self, key: str) -> int:
+        return self._refs[key]
+
+    def put(self, data: bytes, acquire: bool = False) -> str:
+        """Store ``data`` if it is new and return its content hash.
+
+        With ``acquire`` the image is also referenced before it can be evicted.
+        """
+        key = content_hash(data)
+        with self._lock:
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+                self._refs[key] += acquire
+                return key
+        with atomic_write(self.root / key) as fp:
+            fp.write(data)
+        with self._lock:
+            if key not in self._sizes:
+                self._sizes[key] = len(data)
+                self.nbytes += len(data)
+            self._refs[key] += acquire
+            self._evict(keep=key)
+        return key
+
+    def get(self, key: str) -> memoryview:
+        """Read-only, zero-copy view of a stored image."""
+        with self._lock:
+            self._sizes.move_to_end(key)
+            if key not in self._maps:
+                if not self._sizes[key]:
+                    return memoryview(b"")
+                with open(self.root / key, "rb") as fp:
+                    self._maps[key] = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            return memoryview(self._maps[key])
+
+    def acquire(self, *keys: str):
+        with self._lock:
+            self._refs.update(keys)
+
+    def release(self, *keys: str):
+        with self._lock:
+            self._refs.subtract(keys)
+            self._refs += Counter()  # drop the keys nobody holds any more
+            self._evict()
+
+    def _evict(self, keep: str = ""):
+        for key in list(self._sizes):
+            if self.nbytes <= self.max_bytes:
+                break
+            if self._refs[key] > 0 or key == keep:
+                continue
+            self.nbytes -= self._sizes.pop(key)
+            # views handed out may still be alive: let the map die with them
+            self._maps.pop(key, None)
+            with contextlib.suppress(OSError):
+                os.remove(self.root / key)
+
+
+class SessionImages:
+    """The uploads of one session, as file name -> content hash in upload order.
+
+    Holds a reference in ``store`` on every image until it is removed or this
+    object is garbage collected along with the session state.
+    """
+
+    def __init__(self, store: ImageStore):
+        self.store = store
+        self._keys: Dict[str, str] = {}
+        # the finalizer only sees the dict, so it does not keep self alive
+        weakref.finalize(self, _release_all, store, self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(list(self._keys.items()))
+
+    def add(self, name: str, data: bytes) -> str:
+        key = self.store.put(data, acquire=True)
+        self.adopt(name, key)
+        return key
+
+    def adopt(self, name: str, key: str):
+        """Add a stored image whose reference the caller already acquired."""
+        if name in self._keys:
+            self.store.release(self._keys[name])
+        self._keys[name] = key
+
+    def remove(self, name: str):
+        self.store.release(self._keys.pop(name))
+
+    def clear(self):
+        keys = list(self._keys.values())
+        self._keys.clear()
+        self.store.release(*keys)
+
+
+def _release_all(store: ImageStore, keys: Dict[str, str]):
+    store.release(*keys.values())
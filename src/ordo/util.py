@@ -1,37 +1,53 @@
 import base64
+import contextlib
 import io
-import warnings
-from typing import Iterable
+import os
+import pathlib
+import tempfile
+from typing import IO, Iterable, Iterator
 
 import numpy as np
-from scipy.optimize import OptimizeWarning, curve_fit
+
+from ordo.pricing import fit_prices
 
 INF = np.inf
 
 
-def get_b64path(bytes: io.BytesIO) -> str:
+def get_b64path(bytes: io.BytesIO, mime: str = "image/png") -> str:
     encoded = base64.b64encode(bytes).decode()
-    return f"data:image/png;base64,{encoded}"
+    return f"data:{mime};base64,{encoded}"
+
+
+@contextlib.contextmanager
+def atomic_write(
+    path: os.PathLike, mode: str = "wb", replace: bool = True
+) -> Iterator[IO]:
+    """Write ``path`` through a temporary file moved over it once complete.
+
+    A concurrent reader never sees a half-written file, and the temporary file
+    is removed if writing fails. Without ``replace``, an existing ``path`` is
+    left alone and :class:`FileExistsError` is raised.
+    """
+    path = pathlib.Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as fp:
+            yield fp
+        if replace:
+            os.replace(tmp, path)
+        else:
+            # unlike a rename, a hard link never overwrites its target
+            os.link(tmp, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
 
 
 def fit_linear_prices(price1: float, price2: float, n: int) -> Iterable[float]:
-    return np.linspace(price1, price2, n)
-
-
-def _expon_func(x, a, b, c):
-    return a * np.exp(b - x) + c
+    return fit_prices("linear", (price1, price2), n)
 
 
 def fit_exponential_prices(
     price1: float, price2: float, price3: float, n: int
 ) -> Iterable[float]:
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore", OptimizeWarning)
-        popt, _ = curve_fit(
-            _expon_func,
-            xdata=[0, n // 2, n - 1],
-            ydata=[price1, price2, price3],
-            p0=[1, 0, 0],
-            bounds=([0, -np.inf, -np.inf], np.inf),
-        )
-    return _expon_func(range(n), *popt)
+    return fit_prices("exponential", (price1, price2, price3), n)
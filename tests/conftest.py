@@ -0,0 +1,27 @@
+import shutil
+
+import pytest
+
+from ordo import consensus, media, store
+
+
+@pytest.fixture(scope="session", autouse=True)
+def scratch_directories(tmp_path_factory):
+    """Keep the tests away from the images, thumbnails and ballots on this machine.
+
+    The environment variables reach the apps started in subprocesses, the
+    module attributes the ones run in-process.
+    """
+    images = tmp_path_factory.mktemp("ordo-images")
+    thumbnails = tmp_path_factory.mktemp("ordo-static")
+    ballots = tmp_path_factory.mktemp("ordo-ballots")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("ORDO_STORE_DIR", str(images))
+        mp.setenv("ORDO_STATIC_DIR", str(thumbnails))
+        mp.setenv("ORDO_BALLOT_DIR", str(ballots))
+        mp.setattr(store, "STORE_DIRECTORY", str(images))
+        mp.setattr(media, "STATIC_DIRECTORY", str(thumbnails))
+        mp.setattr(consensus, "BALLOT_DIRECTORY", str(ballots))
+        yield
+    for directory in (images, thumbnails, ballots):
+        shutil.rmtree(directory, ignore_errors=True)
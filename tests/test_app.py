@@ -1,7 +1,287 @@
+import io
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+from PIL import Image
 from streamlit.testing.v1 import AppTest
 
+from ordo.consensus import save_ballot, team_directory
+
+APP_PATH = pathlib.Path(__file__).parents[1] / "src" / "ordo" / "app.py"
+
 
 def test_running():
     app = AppTest.from_file("src/ordo/__init__.py")
     app.run()
     assert not app.exception
+
+
+def _upload(app, names):
+    for i, name in enumerate(names):
+        buf = io.BytesIO()
+        Image.new("RGB", (32, 32), (40 * i, 80, 120)).save(buf, format="PNG")
+        app.file_uploader[0].upload(name, buf.getvalue(), "image/png")
+
+
+def test_batch_prices():
+    app = AppTest.from_file(str(APP_PATH))
+    app.run()
+    _upload(app, ["coat.png", "skirt.png", "hat.30.png"])
+    app.run()
+    assert len(app.number_input) == 2
+    app.number_input(key="price_of_coat.png").set_value(120)
+    app.button[0].click().run()
+    assert app.warning
+    app.number_input(key="price_of_skirt.png").set_value(80)
+    app.button[0].click().run()
+    assert not app.exception
+    assert app.session_state["price_map"] == {"coat.png": 120, "skirt.png": 80}
+    assert app.session_state["ranking"].n == 3
+
+
+def test_exact_duplicates():
+    app = AppTest.from_file(str(APP_PATH))
+    app.run()
+    _upload(app, ["coat.10.png", "skirt.20.png"])
+    _upload(app, ["coat_again.10.png"])
+    app.run()
+    assert not app.exception
+    assert "coat_again.10.png" in app.info[0].value
+    assert not app.checkbox
+    assert app.session_state["ranking"].n == 2
+
+
+def test_uploads_are_stored_and_removable():
+    app = AppTest.from_file(str(APP_PATH))
+    app.run()
+    _upload(app, ["coat.10.png", "skirt.20.png", "hat.30.png"])
+    app.run()
+    # the uploader was replaced: the session only holds content hashes
+    assert not app.file_uploader[0].value
+    assert len(app.session_state["uploads"]) == 3
+    app.multiselect(key="remove").select("hat.30.png").run()
+    assert not app.exception
+    assert [name for name, _ in app.session_state["uploads"]] == [
+        "coat.10.png",
+        "skirt.20.png",
+    ]
+    assert app.session_state["ranking"].n == 2
+
+
+def test_unreadable_uploads():
+    app = AppTest.from_file(str(APP_PATH))
+    app.run()
+    _upload(app, ["coat.10.png", "skirt.20.png"])
+    app.file_uploader[0].upload("notes.30.png", b"not an image", "image/png")
+    app.run()
+    assert not app.exception
+    assert "notes.30.png" in app.warning[0].value
+    assert app.session_state["ranking"].n == 2
+
+
+def test_summary_is_paged_filtered_and_exported():
+    app = AppTest.from_file(str(APP_PATH), default_timeout=30)
+    app.run()
+    for i in range(30):
+        buf = io.BytesIO()
+        Image.new("RGB", (32, 32), (4 * i, 80, 120)).save(buf, format="PNG")
+        app.file_uploader[0].upload(
+            f"item{i}.{10 * (i * 7 % 30 + 1)}.png", buf.getvalue()
+        )
+    app.run()
+    session = app.session_state["ranking"]
+    while (pair := session.next_pair()) is not None:
+        session.record(*sorted(pair))
+    app.run()
+    app.radio(key="dist_type").set_value("linear").run()
+    app.number_input(key="price_0").set_value(300)
+    app.number_input(key="price_29").set_value(10).run()
+    assert not app.exception
+    df = app.dataframe[-1].value
+    assert len(df) == 25
+    assert df["name"].tolist()[:2] == ["item0", "item1"]
+    app.number_input(key="summary-page").set_value(2).run()
+    assert len(app.dataframe[-1].value) == 5
+    app.number_input(key="limit-input").set_value(0).run()
+    assert not app.exception
+    df = app.dataframe[-1].value
+    assert (df["price - value"] <= 0).all() and len(df) < 25
+
+
+def test_heavy_imports_wait_for_step_3():
+    # a fresh interpreter, since other tests have imported pandas already
+    script = f"""
+import io, sys
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({str(APP_PATH)!r}, default_timeout=30)
+app.run()
+for i in range(3):
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), (60 * i, 80, 120)).save(buf, format="PNG")
+    app.file_uploader[0].upload(f"item{{i}}.{{i + 1}}0.png", buf.getvalue())
+app.run()
+assert not app.exception
+print(*sorted({{"pandas", "scipy", "matplotlib"}} & set(sys.modules)))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_runs_from_a_checkout():
+    # as after `git clone` and `streamlit run src/ordo/app.py`, without installing
+    script = f"""
+import importlib.metadata, sys
+from streamlit.testing.v1 import AppTest
+sys.path = [p for p in sys.path if p != {str(APP_PATH.parents[1])!r}]
+version = importlib.metadata.version
+def uninstalled(name):
+    if name == "ordo":
+        raise importlib.metadata.PackageNotFoundError(name)
+    return version(name)
+importlib.metadata.version = uninstalled
+app = AppTest.from_file({str(APP_PATH)!r}, default_timeout=30)
+app.run()
+assert not app.exception, app.exception
+print(sys.modules["ordo"].__version__)
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=APP_PATH.parents[2],
+    )
+    assert result.stdout.strip() == "unknown"
+
+
+def test_thumbnails_inline_without_static_directory(tmp_path):
+    (tmp_path / "static").write_text("not a directory")
+    script = f"""
+import io
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({str(APP_PATH)!r}, default_timeout=30)
+app.run()
+buf = io.BytesIO()
+Image.new("RGB", (32, 32)).save(buf, format="PNG")
+app.file_uploader[0].upload("coat.png", buf.getvalue(), "image/png")
+app.run()
+assert not app.exception, app.exception
+print(*(m.value[:30] for m in app.markdown if m.value.startswith("<img")))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=APP_PATH.parents[2],
+        env={**os.environ, "ORDO_STATIC_DIR": str(tmp_path / "static")},
+    )
+    assert result.stdout.startswith('<img src="data:image/')
+    assert "inlining thumbnails" in result.stderr
+
+
+def test_full_runs_profile_the_comparison_widget(tmp_path):
+    script = f"""
+import io
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({str(APP_PATH)!r}, default_timeout=30)
+app.run()
+for i in range(3):
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), (60 * i, 80, 120)).save(buf, format="PNG")
+    app.file_uploader[0].upload(f"item{{i}}.{{i + 1}}0.png", buf.getvalue())
+app.run()
+app.run()
+app.run()
+assert not app.exception, app.exception
+"""
+    subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        cwd=APP_PATH.parents[2],
+        env={**os.environ, "ORDO_PROFILE": "1", "ORDO_PROFILE_DIR": str(tmp_path)},
+    )
+    lines = (tmp_path / "reruns.jsonl").read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert {record["scope"] for record in records} == {"app"}
+    phases = [phase["phase"] for phase in records[-1]["phases"]]
+    assert "pair generation" in phases and "html rendering" in phases
+
+
+def _rank_in_upload_order(app):
+    session = app.session_state["ranking"]
+    while (pair := session.next_pair()) is not None:
+        session.record(*sorted(pair))
+    app.run()
+
+
+def _share(app):
+    next(button for button in app.button if button.label == "Share").click().run()
+
+
+def test_pairwise_mode():
+    app = AppTest.from_file(str(APP_PATH))
+    app.run()
+    _upload(app, ["coat.30.png", "skirt.20.png", "hat.10.png"])
+    app.run()
+    app.radio(key="mode").set_value("pairwise").run()
+    session = app.session_state["ranking"]
+    assert type(session.scheduler).__name__ == "PairwiseScheduler"
+    assert session.next_pair() == (0, 1)
+    _rank_in_upload_order(app)
+    assert not app.exception
+    assert session.ranking() == [0, 1, 2]
+
+
+def test_team_consensus():
+    app = AppTest.from_file(str(APP_PATH))
+    app.run()
+    _upload(app, ["coat.30.png", "skirt.20.png", "hat.10.png"])
+    app.run()
+    _rank_in_upload_order(app)
+    app.text_input(key="team").input("shop")
+    app.text_input(key="judge").input("me").run()
+    _share(app)
+    assert any("Shared your" in success.value for success in app.success)
+    # sharing again under the same name needs an explicit replace
+    _share(app)
+    assert app.warning and app.checkbox(key="replace_ballot")
+    app.checkbox(key="replace_ballot").check()
+    _share(app)
+    assert not app.warning
+
+    coat, skirt, hat = app.session_state["ranked_keys"]
+    other = "0" * 32
+    # two teammates, who uploaded in another order, prefer the hat to the coat
+    save_ballot("shop", "ann", [hat, skirt, coat], [(0, 2), (2, 1)])
+    save_ballot("shop", "bob", [hat, skirt, coat, other], [(0, 2), (3, 0)])
+    with pytest.raises(FileExistsError):
+        save_ballot("shop", "bob", [hat, coat], [(1, 0)])
+    # another team's ballots are never mixed in
+    save_ballot("market", "eve", [coat, hat], [(0, 1)] * 5)
+    app.run()
+    assert len(os.listdir(team_directory("shop"))) == 3
+    app.radio(key="ranking_source").set_value("team").run()
+    app.number_input(key="price_0").set_value(30)
+    app.number_input(key="price_2").set_value(10).run()
+    assert not app.exception
+    assert app.dataframe[-1].value["name"].tolist() == ["hat", "coat", "skirt"]
+
+    # in top-k mode the consensus only fills the places being ranked
+    app.radio(key="mode").set_value("top-k").run()
+    app.number_input(key="top_k").set_value(2).run()
+    _rank_in_upload_order(app)
+    app.radio(key="ranking_source").set_value("team").run()
+    app.number_input(key="price_0").set_value(30)
+    app.number_input(key="price_1").set_value(10).run()
+    assert not app.exception
+    assert app.dataframe[-1].value["name"].tolist() == ["hat", "coat"]
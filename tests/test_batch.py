@@ -0,0 +1,80 @@
+import csv
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from ordo import batch
+from ordo.__main__ import main
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    for name in ["coat.300.jpg", "hat.40.png", "skirt.120.jpg", "notes.txt"]:
+        (tmp_path / name).touch()
+    (tmp_path / "nested.10.jpg").mkdir()
+    return tmp_path
+
+
+def test_scan_and_read(catalog, tmp_path):
+    items = batch.scan_items(catalog)
+    assert [item.title for item in items] == ["coat", "hat", "skirt"]
+    log = tmp_path / "log.jsonl"
+    log.write_text(
+        "\n".join(
+            json.dumps(row)
+            for row in [
+                {"winner": "hat", "loser": "coat"},
+                {"winner": "coat.300.jpg", "loser": "skirt"},
+            ]
+        )
+    )
+    winners, losers = batch.read_comparisons(log, batch.item_index(items))
+    np.testing.assert_array_equal(winners, [1, 0])
+    np.testing.assert_array_equal(losers, [0, 2])
+    assert batch.rank_items(3, winners, losers) == [1, 0, 2]
+    assert batch.rank_items(3, winners, losers, "bradley-terry") == [1, 0, 2]
+    log.write_text(json.dumps({"winner": "hat", "loser": "scarf"}))
+    with pytest.raises(ValueError, match="log.jsonl:1"):
+        batch.read_comparisons(log, batch.item_index(items))
+
+
+def test_rank_command(catalog, tmp_path):
+    log = tmp_path / "log.csv"
+    with open(log, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerows([["winner", "loser"], ["skirt", "hat"], ["coat", "skirt"]])
+    output = tmp_path / "summary.csv"
+    assert main(["rank", str(catalog), str(log), "-o", str(output)]) == 0
+    with open(output, newline="") as fp:
+        rows = list(csv.DictReader(fp))
+    assert [row["name"] for row in rows] == [
+        "coat.300.jpg",
+        "skirt.120.jpg",
+        "hat.40.png",
+    ]
+    # anchors default to the listed prices of the first and last items
+    assert [float(row["value"]) for row in rows] == [300, 170, 40]
+
+
+def test_rank_does_not_import_streamlit(catalog, tmp_path):
+    log = tmp_path / "log.csv"
+    log.write_text("winner,loser\ncoat,hat\n")
+    code = (
+        "import sys; from ordo.__main__ import main; "
+        f"main(['rank', {str(catalog)!r}, {str(log)!r}, '-o', "
+        f"{str(tmp_path / 'out.csv')!r}]); "
+        "assert 'streamlit' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_rank_command_checks_anchors(catalog, tmp_path, capsys):
+    log = tmp_path / "log.csv"
+    log.write_text("winner,loser\ncoat,hat\n")
+    output = tmp_path / "summary.csv"
+    assert main(["rank", str(catalog), str(log), "-o", str(output), "--anchors", "100"])
+    assert "needs 2 anchor prices, got 1" in capsys.readouterr().err
+    assert not output.exists()
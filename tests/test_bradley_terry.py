@@ -0,0 +1,28 @@
+import numpy as np
+
+from ordo.bradley_terry import fit_bradley_terry, prob_ordered, score_variances
+
+
+def test_fit_orders_items():
+    winners = np.array([0, 0, 1, 1, 2, 0])
+    losers = np.array([1, 2, 2, 3, 3, 3])
+    scores = fit_bradley_terry(winners, losers, 4)
+    assert np.argsort(-scores).tolist() == [0, 1, 2, 3]
+    warm = fit_bradley_terry(winners, losers, 4, init=scores)
+    assert np.allclose(warm, scores, atol=1e-5)
+
+
+def test_fit_tolerates_contradictions():
+    winners = np.array([0, 1, 0, 0])
+    losers = np.array([1, 0, 1, 1])
+    scores = fit_bradley_terry(winners, losers, 2)
+    assert np.all(np.isfinite(scores))
+    assert scores[0] > scores[1]
+
+
+def test_variances_shrink_with_data():
+    scores = np.zeros(2)
+    few = score_variances(scores, np.array([0]), np.array([1]))
+    many = score_variances(scores, np.zeros(10, int), np.ones(10, int))
+    assert np.all(many < few)
+    assert prob_ordered(np.array([0.0]), np.array([1.0]))[0] == 0.5
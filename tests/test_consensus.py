@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from ordo import consensus
+
+
+def test_ballots_round_trip(tmp_path):
+    assert consensus.ballots_stamp("shop", tmp_path / "missing") == ()
+    consensus.save_ballot("shop", "Ann Lee", ["a1", "b2"], [(1, 0)], tmp_path)
+    consensus.save_ballot("shop", "bob", ["b2", "a1"], [], tmp_path)
+    # another team, and a judge name that sanitises like an existing one
+    consensus.save_ballot("market", "bob", ["c3"], [], tmp_path)
+    consensus.save_ballot("shop", "Ann_Lee", ["c3"], [], tmp_path)
+    with pytest.raises(FileExistsError):
+        consensus.save_ballot("shop", "bob", ["b2", "c3"], [(0, 1)], tmp_path)
+    consensus.save_ballot("shop", "bob", ["b2", "c3"], [(0, 1)], tmp_path, True)
+    names = [name for name, _ in consensus.ballots_stamp("shop", tmp_path)]
+    assert len(names) == 3
+    assert not any(name.endswith(".tmp") for name in names)
+    ballots = {b.judge: b for b in consensus.load_ballots("shop", tmp_path)}
+    assert sorted(ballots) == ["Ann Lee", "Ann_Lee", "bob"]
+    ann = ballots["Ann Lee"]
+    assert ann.items.tolist() == ["a1", "b2"]
+    assert (ann.winners.tolist(), ann.losers.tolist()) == ([1], [0])
+    assert ballots["bob"].items.tolist() == ["b2", "c3"]
+    assert [b.judge for b in consensus.load_ballots("market", tmp_path)] == ["bob"]
+
+
+def test_win_matrix_matches_items_by_hash():
+    ballots = [
+        consensus.Ballot(
+            "ann",
+            np.array(["a", "b", "c"]),
+            np.array([0, 0, 1, 1]),
+            np.array([1, 2, 2, 1]),
+        ),
+        # another upload order, and an item the others do not have
+        consensus.Ballot(
+            "bob", np.array(["c", "a", "x"]), np.array([1, 2]), np.array([0, 1])
+        ),
+        consensus.Ballot(
+            "eve", np.array([], dtype=str), np.array([], int), np.array([], int)
+        ),
+    ]
+    wins = consensus.win_matrix(ballots, {"a": 0, "b": 1, "c": 2}, 3)
+    np.testing.assert_array_equal(wins.toarray(), [[0, 1, 2], [0, 0, 1], [0, 0, 0]])
+
+
+def test_rankings_agree_with_a_noisy_majority():
+    rng = np.random.default_rng(0)
+    n = 50
+    names = np.array([f"item{i}" for i in range(n)])
+    ballots = []
+    for judge in range(20):
+        a = rng.integers(0, n, 300)
+        b = rng.integers(0, n, 300)
+        flip = rng.random(300) < 0.2
+        better = np.where((a < b) ^ flip, a, b)
+        worse = np.where((a < b) ^ flip, b, a)
+        ballots.append(consensus.Ballot(str(judge), names, better, worse))
+    wins = consensus.win_matrix(ballots, {name: i for i, name in enumerate(names)}, n)
+    for method in consensus.METHODS:
+        ranking = consensus.consensus_ranking(wins, method)
+        assert sorted(ranking) == list(range(n))
+        # Spearman's footrule against the true order stays small
+        assert np.abs(np.array(ranking) - np.arange(n)).mean() < 2
+    with pytest.raises(ValueError):
+        consensus.consensus_ranking(wins, "borda")
+
+
+def test_kemeny_fixes_adjacent_disagreements():
+    from scipy import sparse
+
+    # net wins put 0 first, but the only direct answer between 0 and 1 favors 1
+    wins = sparse.csr_array(
+        np.array([[0, 0, 3, 3], [1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 0, 0]])
+    )
+    assert consensus.kemeny_ranking(wins) == [1, 0, 2, 3]
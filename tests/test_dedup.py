@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from ordo.dedup import dhash, hamming_distances, near_duplicates
+
+
+def _jpeg(seed, size=(80, 60), quality=90):
+    rng = np.random.default_rng(seed)
+    # smooth blobs so the hash has structure to latch on to
+    pixels = rng.random((6, 8, 3)) * 255
+    image = Image.fromarray(pixels.astype(np.uint8)).resize((80, 60), Image.BILINEAR)
+    buf = io.BytesIO()
+    image.resize(size).save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def test_dhash():
+    h = dhash(_jpeg(0))
+    assert h.dtype == np.uint8 and h.shape == (8,)
+    assert dhash(b"not an image") is None
+    buf = io.BytesIO()
+    Image.new("RGB", (80, 60), (200, 30, 30)).save(buf, format="PNG")
+    assert dhash(buf.getvalue()) is None
+
+
+def test_hamming_distances():
+    hashes = np.array([[0b1111, 0], [0b0101, 0], [0b1111, 255]], dtype=np.uint8)
+    np.testing.assert_array_equal(
+        hamming_distances(hashes), [[0, 2, 8], [2, 0, 10], [8, 10, 0]]
+    )
+
+
+def test_near_duplicates():
+    hashes = np.stack(
+        [
+            dhash(_jpeg(0)),
+            dhash(_jpeg(1)),
+            dhash(_jpeg(0, size=(800, 600), quality=50)),
+            dhash(_jpeg(2)),
+            dhash(_jpeg(1, size=(40, 30))),
+        ]
+    )
+    assert near_duplicates(hashes) == [[0, 2], [1, 4]]
+    assert near_duplicates(hashes[:1]) == []
@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+
+from ordo.engine import RankingSession
+
+
+def test_session():
+    order = list(range(30))
+    random.Random(2).shuffle(order)
+    rank = {item: r for r, item in enumerate(order)}
+    session = RankingSession(30)
+    asked = 0
+    while (pair := session.next_pair()) is not None:
+        asked += 1
+        i, j = pair
+        assert not session.graph.knows(i, j)
+        session.record(*(pair if rank[i] < rank[j] else pair[::-1]))
+    assert session.done
+    assert session.ranking() == order
+    assert asked <= 30 * 5
+    assert len(session.history) == asked
+    assert all(rank[winner] < rank[loser] for winner, loser in session.history)
+    assert session.graph.n_known == 30 * 29 // 2
+
+
+def test_fit_values():
+    session = RankingSession(5)
+    assert np.allclose(session.fit_values("linear", 100, 0), [100, 75, 50, 25, 0])
+
+
+def test_pairwise_session():
+    session = RankingSession(6, scheduler="pairwise")
+    asked = 0
+    while (pair := session.next_pair()) is not None:
+        asked += 1
+        session.record(*sorted(pair))
+    assert session.ranking() == list(range(6))
+    assert asked <= 15 == session.graph.n_known
+
+
+def test_top_k_session():
+    session = RankingSession(10, scheduler="top-k", k=3)
+    while (pair := session.next_pair()) is not None:
+        session.record(*sorted(pair))
+    assert session.ranking() == [0, 1, 2]
+    assert np.allclose(session.fit_values("linear", 30, 10), [30, 20, 10])
+
+
+def test_lookahead_predicts_next_pair():
+    for scheduler in ["binary-insertion", "bradley-terry", "top-k"]:
+        session = RankingSession(12, scheduler=scheduler)
+        hits = misses = 0
+        while (pair := session.next_pair()) is not None:
+            lookahead = session.lookahead()
+            assert not set(lookahead) & set(pair)
+            session.record(*sorted(pair))
+            following = session.next_pair()
+            if following is not None:
+                if set(following) - set(pair) <= set(lookahead):
+                    hits += 1
+                else:
+                    misses += 1
+        if scheduler == "binary-insertion":
+            assert misses == 0
+        elif scheduler == "bradley-terry":
+            # guessed from the strengths before the refit
+            assert hits >= 3 * misses
+    assert RankingSession(3, scheduler="pairwise").lookahead() == []
@@ -0,0 +1,35 @@
+import numpy as np
+
+from ordo.graph import PreferenceGraph
+
+
+def test_closure():
+    graph = PreferenceGraph(4)
+    assert graph.record(0, 1)
+    assert graph.record(2, 3)
+    assert graph.record(1, 2)
+    assert graph.prefers(0, 3) and not graph.prefers(3, 0)
+    assert graph.knows(3, 0)
+    assert graph.n_known == 6
+    assert graph.ranking() == [0, 1, 2, 3]
+    assert graph.better_than(1).tolist() == [2, 3]
+
+
+def test_known_and_contradicting_pairs_are_ignored():
+    graph = PreferenceGraph(3)
+    graph.record(0, 1)
+    graph.record(1, 2)
+    assert not graph.record(0, 2)
+    assert not graph.record(2, 0)
+    assert graph.n_known == 3
+    assert np.array_equal(graph.wins(), [2, 1, 0])
+
+
+def test_add_items():
+    graph = PreferenceGraph(2)
+    graph.record(1, 0)
+    graph.add_items(3)
+    graph.record(4, 1)
+    assert graph.n == 5
+    assert graph.prefers(4, 0)
+    assert graph.ranking()[:3] == [4, 1, 0]
@@ -0,0 +1,40 @@
+import io
+
+from PIL import Image
+
+from ordo.images import ThumbnailCache, make_thumbnail, sniff_mime
+
+
+def _jpeg(width, height, color=(200, 30, 30)):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def test_make_thumbnail():
+    content, mime = make_thumbnail(_jpeg(2000, 1000), size=100)
+    assert mime == "image/jpeg"
+    assert Image.open(io.BytesIO(content)).size == (100, 50)
+    small = _jpeg(50, 50)
+    assert make_thumbnail(small, size=100) == (small, "image/jpeg")
+    assert make_thumbnail(b"GIF89a not really", size=100)[1] == "image/gif"
+    assert sniff_mime(b"unknown") == "image/png"
+
+
+def test_cache_hits_and_evicts():
+    cache = ThumbnailCache(size=100)
+    first = cache.get(_jpeg(400, 400))
+    assert first.b64path.startswith("data:image/jpeg;base64,")
+    assert cache.get(_jpeg(400, 400)) is first
+    cache.max_bytes = first.nbytes
+    cache.get(_jpeg(400, 400, color=(0, 0, 255)))
+    assert len(cache) == 1
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_make_thumbnail_refuses_decompression_bombs(monkeypatch):
+    data = _jpeg(400, 400)
+    # Pillow refuses images over twice this many pixels
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    assert make_thumbnail(data, size=100) == (data, "image/jpeg")
+    assert ThumbnailCache(size=100).get(data).content == data
@@ -0,0 +1,46 @@
+import pytest
+
+from ordo.images import Thumbnail
+from ordo.media import MediaStore
+
+
+def test_url(tmp_path):
+    store = MediaStore(tmp_path / "static", "/app/static/")
+    thumbnail = Thumbnail("abc", b"\xff\xd8\xff", "image/jpeg", "")
+    assert store.url(thumbnail) == "/app/static/abc.jpg"
+    assert (tmp_path / "static" / "abc.jpg").read_bytes() == b"\xff\xd8\xff"
+    assert store.url(thumbnail) == "/app/static/abc.jpg"
+    assert [p.name for p in (tmp_path / "static").iterdir()] == ["abc.jpg"]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = MediaStore(tmp_path, "/app/static", max_bytes=8, keep_seconds=0)
+    a, b, c = (Thumbnail(key, b"1234", "image/png", "") for key in "abc")
+    store.url(a)
+    store.url(b)
+    store.url(a)
+    store.url(c)
+    # b was handed out least recently
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.png", "c.png"]
+    assert store.nbytes == 8
+    store.url(b)
+    assert (tmp_path / "b.png").exists() and not (tmp_path / "a.png").exists()
+    assert len(MediaStore(tmp_path, "/app/static")) == 2
+
+
+def test_keeps_recently_handed_out(tmp_path):
+    store = MediaStore(tmp_path, max_bytes=4)
+    a, b = (Thumbnail(key, b"1234", "image/png", "") for key in "ab")
+    assert store.url(a) == "/app/static/a.png"
+    store.url(b)
+    # another session may still be loading a.png
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.png", "b.png"]
+    store.keep_seconds = 0
+    store.url(a)
+    assert [p.name for p in tmp_path.iterdir()] == ["a.png"]
+
+
+def test_unwritable_root(tmp_path):
+    (tmp_path / "static").write_text("not a directory")
+    with pytest.raises(OSError):
+        MediaStore(tmp_path / "static")
@@ -0,0 +1,33 @@
+import io
+
+from PIL import Image
+
+from ordo.images import ThumbnailCache
+from ordo.pipeline import UploadPipeline
+from ordo.store import ImageStore
+
+
+def _png():
+    buf = io.BytesIO()
+    Image.linear_gradient("L").rotate(90).resize((64, 48)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_pipeline(tmp_path):
+    store = ImageStore(tmp_path)
+    pipeline = UploadPipeline(store, ThumbnailCache(size=32), max_workers=2)
+    keys = pipeline.put([_png(), b"not an image", _png()])
+    assert keys[0] == keys[2] and store.refs(keys[0]) == 2
+    pipeline.wait(keys)
+    image, broken, _ = (pipeline.submit(key).result() for key in keys)
+    assert image.valid and image.dhash is not None
+    assert not broken.valid
+    assert pipeline.submit(keys[0]) is pipeline.submit(keys[2])
+
+
+def test_decompression_bombs_are_unreadable(tmp_path, monkeypatch):
+    # Pillow refuses images over twice this many pixels
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    pipeline = UploadPipeline(ImageStore(tmp_path), ThumbnailCache(size=32))
+    (key,) = pipeline.put([_png()])
+    assert pipeline.submit(key).result() == (False, None)
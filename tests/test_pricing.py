@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from ordo.pricing import PRICE_MODELS, anchor_positions, fit_many, fit_prices
+
+
+def test_anchor_positions():
+    assert anchor_positions(9, 2).tolist() == [0, 8]
+    assert anchor_positions(10, 3).tolist() == [0, 5, 9]
+    assert anchor_positions(9, 4).tolist() == [0, 3, 6, 8]
+
+
+@pytest.mark.parametrize("model", list(PRICE_MODELS))
+def test_models_are_monotone(model):
+    k = PRICE_MODELS[model].n_anchors
+    values = fit_prices(model, np.linspace(300, 20, k), 25)
+    assert values.shape == (25,)
+    assert np.all(np.diff(values) <= 1e-9)
+
+
+def test_fit_prices_is_memoized():
+    values = fit_prices("exponential", (100, 50, 40), 9)
+    assert fit_prices("exponential", [100.0, 50.0, 40.0], 9) is values
+    assert not values.flags.writeable
+
+
+def test_fit_many():
+    prices = np.array([[100, 50, 40, 10], [80, 60, 30, 5]])
+    values = fit_many("piecewise", prices, 10, positions=[0, 3, 6, 9])
+    assert values.shape == (2, 10)
+    assert np.allclose(values[:, [0, 3, 6, 9]], prices)
+    batched = fit_many("log", prices, 10)
+    assert np.allclose(batched[1], fit_prices("log", prices[1], 10))
+
+
+def test_power_needs_positive_prices():
+    with pytest.raises(ValueError):
+        fit_prices("power", (100, 10, 0), 5)
@@ -0,0 +1,52 @@
+import json
+import time
+
+from ordo.profiling import NULL_RERUN, Profiler, start_rerun
+
+
+def test_null_rerun():
+    assert start_rerun(None, {}) is NULL_RERUN
+    with NULL_RERUN.phase("anything"):
+        pass
+    assert len(NULL_RERUN.phases) == 0
+
+
+def test_profiler_exports(tmp_path):
+    profiler = Profiler(tmp_path)
+    state = {}
+    rerun = start_rerun(profiler, state)
+    with rerun.phase("closure update"):
+        [0] * 1000
+    with rerun.phase("html rendering"):
+        pass
+    time.sleep(0.01)
+    rerun.finish()
+    # the previous rerun is only written once the next one starts
+    assert not (tmp_path / "reruns.jsonl").exists()
+    start_rerun(profiler, state)
+
+    (line,) = (tmp_path / "reruns.jsonl").read_text().splitlines()
+    record = json.loads(line)
+    assert record["scope"] == "app"
+    assert record["session"] == state["_profile_session"]
+    # wall time of the whole rerun, not only of its phases
+    assert record["seconds"] >= 0.01 + sum(p["seconds"] for p in record["phases"])
+    assert [p["phase"] for p in record["phases"]] == [
+        "closure update",
+        "html rendering",
+    ]
+    metrics = (tmp_path / "metrics.prom").read_text()
+    assert 'ordo_reruns_total{scope="app"} 1' in metrics
+    assert 'ordo_phase_calls_total{phase="closure update"} 1' in metrics
+
+
+def test_scopes_are_separate(tmp_path):
+    profiler = Profiler(tmp_path)
+    state = {}
+    with start_rerun(profiler, state, "app").phase("upload dedup"):
+        pass
+    with start_rerun(profiler, state, "fragment").phase("pair generation"):
+        pass
+    assert not profiler.recent
+    start_rerun(profiler, state, "fragment")
+    assert [r["scope"] for r in profiler.recent] == ["fragment"]
@@ -0,0 +1,150 @@
+import math
+import random
+
+import numpy as np
+import pytest
+from scipy.stats import kendalltau
+
+from ordo.graph import PreferenceGraph
+from ordo.scheduler import (
+    BinaryInsertionScheduler,
+    BradleyTerryScheduler,
+    PairwiseScheduler,
+    Scheduler,
+    TopKScheduler,
+)
+
+
+def _run(scheduler, order, skip_every=0):
+    rank = {item: r for r, item in enumerate(order)}
+    asked = 0
+    while (pair := scheduler.next_pair()) is not None:
+        asked += 1
+        if skip_every and asked % skip_every == 0:
+            scheduler.skip(pair)
+            continue
+        i, j = pair
+        if rank[i] < rank[j]:
+            scheduler.record(i, j)
+        else:
+            scheduler.record(j, i)
+    return asked
+
+
+def test_binary_insertion_sorts():
+    order = list(range(40))
+    random.Random(0).shuffle(order)
+    scheduler = BinaryInsertionScheduler(40)
+    bound = scheduler.remaining()
+    asked = _run(scheduler, order)
+    assert scheduler.ranking() == order
+    assert asked <= bound == sum(math.ceil(math.log2(m + 1)) for m in range(40))
+    assert scheduler.remaining() == 0
+
+
+def test_binary_insertion_skips():
+    order = list(range(20))
+    random.Random(1).shuffle(order)
+    scheduler = BinaryInsertionScheduler(20)
+    _run(scheduler, order, skip_every=3)
+    assert scheduler.ranking() == order
+
+
+def test_binary_insertion_add_items():
+    scheduler = BinaryInsertionScheduler(3)
+    _run(scheduler, [2, 0, 1])
+    scheduler.add_items(2)
+    assert scheduler.next_pair() is not None
+    _run(scheduler, [2, 4, 0, 1, 3])
+    assert scheduler.ranking() == [2, 4, 0, 1, 3]
+
+
+def test_pairwise_prunes_implied_pairs():
+    graph = PreferenceGraph(4)
+    scheduler = PairwiseScheduler(4, graph)
+    assert scheduler.remaining() == 6
+    assert scheduler.next_pair() == (0, 1)
+    scheduler.record(0, 1)
+    assert scheduler.next_pair() == (0, 2)
+    scheduler.skip((0, 2))
+    assert scheduler.next_pair() == (0, 3)
+    scheduler.record(3, 0)
+    # 3 > 0 > 1 settles (1, 3), the skipped (0, 2) comes back last
+    assert scheduler.next_pair() == (1, 2)
+    scheduler.record(2, 1)
+    assert scheduler.next_pair() == (2, 3)
+    scheduler.record(3, 2)
+    assert scheduler.next_pair() == (0, 2)
+    scheduler.record(0, 2)
+    assert scheduler.next_pair() is None
+    assert scheduler.remaining() == 0
+    assert scheduler.ranking() == [3, 0, 2, 1]
+
+
+def test_pairwise_add_items():
+    scheduler = PairwiseScheduler(2)
+    scheduler.record(*scheduler.next_pair())
+    scheduler.add_items(1)
+    assert scheduler.next_pair() == (0, 2)
+    assert scheduler.remaining() == 2
+
+
+def test_bradley_terry_recovers_noisy_order():
+    rng = np.random.default_rng(0)
+    order = rng.permutation(15)
+    rank = np.argsort(order)
+    scheduler = BradleyTerryScheduler(15)
+    while (pair := scheduler.next_pair()) is not None:
+        i, j = pair
+        winner, loser = (i, j) if rank[i] < rank[j] else (j, i)
+        if rng.random() < 0.1:
+            winner, loser = loser, winner
+        scheduler.record(winner, loser)
+    assert scheduler.n_comparisons <= scheduler.max_comparisons
+    assert scheduler.remaining() == 0
+    assert kendalltau(rank[scheduler.ranking()], np.arange(15)).statistic > 0.8
+
+
+def test_top_k_tournament():
+    order = list(range(64))
+    random.Random(5).shuffle(order)
+    scheduler = TopKScheduler(64, k=3)
+    assert scheduler.remaining() == 63 + 2 * 6
+    asked = _run(scheduler, order)
+    assert scheduler.ranking() == order[:3]
+    assert asked <= 63 + 2 * 6
+    # everything else is known to lose to all three favorites
+    assert scheduler.graph.dominates[order[:3]][:, order[3:]].all()
+
+
+def test_top_k_skips_and_add_items():
+    order = [4, 1, 5, 0, 3, 2]
+    scheduler = TopKScheduler(4, k=2)
+    _run(scheduler, [i for i in order if i < 4], skip_every=3)
+    assert scheduler.ranking() == [1, 0]
+    scheduler.add_items(2)
+    assert not scheduler.done
+    _run(scheduler, order)
+    assert scheduler.ranking() == [4, 1]
+    assert TopKScheduler(2, k=5).n_ranked == 2
+
+
+def test_incomplete_scheduler_fails_at_construction():
+    class NoRanking(Scheduler):
+        def next_pair(self):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        NoRanking(3)
+
+
+def test_binary_insertion_tries_every_pivot():
+    scheduler = BinaryInsertionScheduler(4)
+    _run(scheduler, [0, 1, 2, 3])
+    scheduler.add_items(1)
+    skipped = []
+    while (pair := scheduler.next_pair()) is not None and len(skipped) < 4:
+        skipped.append(pair[1])
+        scheduler.skip(pair)
+    # every position of the even-sized range, including the first, is tried
+    assert sorted(skipped) == [0, 1, 2, 3]
@@ -0,0 +1,41 @@
+import gc
+
+from ordo.store import ImageStore, SessionImages
+
+
+def test_put_and_get(tmp_path):
+    store = ImageStore(tmp_path)
+    key = store.put(b"\x89PNG one")
+    assert store.put(b"\x89PNG one") == key
+    assert bytes(store.get(key)) == b"\x89PNG one"
+    assert len(store) == 1 and store.nbytes == 8
+    # a new process picks up what is already on disk
+    assert key in ImageStore(tmp_path)
+
+
+def test_eviction_spares_referenced_images(tmp_path):
+    store = ImageStore(tmp_path, max_bytes=10)
+    held = store.put(b"a" * 6, acquire=True)
+    free = store.put(b"b" * 6)
+    assert held in store and free in store
+    store.put(b"c" * 6)
+    assert held in store and free not in store
+    assert not (tmp_path / free).exists()
+    store.release(held)
+    store.put(b"d" * 6)
+    assert held not in store
+
+
+def test_session_images(tmp_path):
+    store = ImageStore(tmp_path)
+    uploads = SessionImages(store)
+    coat = uploads.add("coat.png", b"coat")
+    uploads.add("copy.png", b"coat")
+    hat = uploads.add("hat.png", b"hat")
+    assert list(uploads) == [("coat.png", coat), ("copy.png", coat), ("hat.png", hat)]
+    assert store.refs(coat) == 2
+    uploads.remove("copy.png")
+    assert store.refs(coat) == 1
+    del uploads
+    gc.collect()
+    assert store.refs(coat) == store.refs(hat) == 0
@@ -1,4 +1,6 @@
-from ordo.util import fit_exponential_prices, fit_linear_prices
+import pytest
+
+from ordo.util import atomic_write, fit_exponential_prices, fit_linear_prices
 
 
 def test_linear():
@@ -14,3 +16,21 @@ def test_expon():
     assert round(values[0]) == 100
     assert round(values[4]) == 45
     assert round(values[-1]) == 44
+
+
+def test_atomic_write(tmp_path):
+    path = tmp_path / "file.txt"
+    with atomic_write(path, "w") as fp:
+        fp.write("first")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path, "w") as fp:
+            fp.write("second")
+            raise RuntimeError
+    # the old content is kept and the temporary file is gone
+    assert path.read_text() == "first"
+    assert [p.name for p in tmp_path.iterdir()] == ["file.txt"]
+    with pytest.raises(FileExistsError):
+        with atomic_write(path, "w", replace=False) as fp:
+            fp.write("third")
+    assert path.read_text() == "first"
+    assert [p.name for p in tmp_path.iterdir()] == ["file.txt"]